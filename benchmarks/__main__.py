@@ -0,0 +1,73 @@
+"""
+Run the benchmark suite and compare runs.
+
+    python -m benchmarks run [--filter REGEX] [--scale 0.1] [--output baseline.json]
+    python -m benchmarks compare baseline.json current.json [--threshold 0.1]
+    python -m benchmarks run --compare baseline.json
+
+Times are per operation, lower is better. `compare` exits with status 1 when a case got slower than the
+baseline by more than the threshold (10% by default), so it can gate CI. The focused scripts
+(``python -m benchmarks.bench_routing`` etc.) are still there for digging into a single hot spot.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from typing import Any, Dict, List, Optional
+
+from .suite import compare, dump, format_time, load, regressions, run
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{report['implementation']} {report['python']} on {report['platform']}")
+    for name, seconds in report["results"].items():
+        print(f"{name:<32} {format_time(seconds):>12}")
+
+
+def print_comparison(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> int:
+    comparisons = compare(baseline, current)
+    slower = regressions(comparisons, threshold)
+    print(f"{'case':<32} {'baseline':>12} {'current':>12} {'change':>8}")
+    for comparison in comparisons:
+        flag = "  REGRESSION" if comparison in slower else ""
+        print(
+            f"{comparison.name:<32} {format_time(comparison.baseline):>12} {format_time(comparison.current):>12}"
+            f" {comparison.change:>+8.1%}{flag}"
+        )
+    if slower:
+        print(f"{len(slower)} case(s) slower than the baseline by more than {threshold:.0%}.")
+        return 1
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the suite")
+    run_parser.add_argument("--filter", help="only run the cases matching this regular expression")
+    run_parser.add_argument("--scale", type=float, default=1.0, help="multiply the iteration counts")
+    run_parser.add_argument("--output", help="save the results as a JSON baseline")
+    run_parser.add_argument("--compare", metavar="BASELINE", help="compare the results with a baseline")
+    run_parser.add_argument("--threshold", type=float, default=0.1)
+
+    compare_parser = subparsers.add_parser("compare", help="compare two saved runs")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        return print_comparison(load(args.baseline), load(args.current), args.threshold)
+
+    report = run(args.filter, args.scale)
+    if args.output:
+        dump(report, args.output)
+    if args.compare:
+        return print_comparison(load(args.compare), report, args.threshold)
+    print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
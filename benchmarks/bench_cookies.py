@@ -0,0 +1,70 @@
+"""
+Cookie benchmarks.
+
+Compares the lazy `Set-Cookie` builder and `Request.cookies` parser with `http.cookies.SimpleCookie`, which
+responses used to create on every construction.
+
+Run with ``python -m benchmarks.bench_cookies``.
+"""
+from __future__ import annotations
+
+import timeit
+from http.cookies import SimpleCookie
+from typing import Callable, Dict, List, Tuple
+
+from soie.requests import Request
+from soie.responses import PlainTextResponse, cookie_attributes
+
+NUMBER = 50_000
+COOKIE_HEADER = b"session=4f2a9c1e8b7d6a5f; theme=dark; locale=zh-TW; _ga=GA1.2.1234567890.1234567890; consent=yes"
+SESSION_ATTRIBUTES = cookie_attributes(max_age=3600, secure=True, httponly=True)
+
+
+def legacy_response(set_cookie: bool) -> List[Tuple[bytes, bytes]]:
+    response = PlainTextResponse("hello")
+    cookies = SimpleCookie()
+    if set_cookie:
+        cookies["session"] = "4f2a9c1e8b7d6a5f"
+        cookies["session"]["max-age"] = 3600
+        cookies["session"]["path"] = "/"
+        cookies["session"]["secure"] = True
+        cookies["session"]["httponly"] = True
+        cookies["session"]["samesite"] = "lax"
+    return [
+        *response.raw_headers(),
+        *((b"set-cookie", c.output(header="").encode("latin-1")) for c in cookies.values()),
+    ]
+
+
+def lazy_response(set_cookie: bool) -> List[Tuple[bytes, bytes]]:
+    response = PlainTextResponse("hello")
+    if set_cookie:
+        response.set_cookie("session", "4f2a9c1e8b7d6a5f", attributes=SESSION_ATTRIBUTES)
+    return response.raw_headers()
+
+
+def legacy_request() -> Dict[str, str]:
+    cookies = SimpleCookie()
+    cookies.load(COOKIE_HEADER.decode("latin-1"))
+    return {key: morsel.value for key, morsel in cookies.items()}
+
+
+def lazy_request() -> Dict[str, str]:
+    return Request({"type": "http", "headers": [(b"cookie", COOKIE_HEADER)]}, None).cookies  # type: ignore
+
+
+def bench(func: Callable[[], object]) -> float:
+    return min(timeit.repeat(func, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def main() -> None:
+    print(f"{'case':>28} {'SimpleCookie (µs)':>18} {'lazy (µs)':>10}")
+    for label, set_cookie in (("response, no cookie", False), ("response, one cookie", True)):
+        legacy = bench(lambda: legacy_response(set_cookie))
+        lazy = bench(lambda: lazy_response(set_cookie))
+        print(f"{label:>28} {legacy:>18.2f} {lazy:>10.2f}")
+    print(f"{'request, parse 5 cookies':>28} {bench(legacy_request):>18.2f} {bench(lazy_request):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
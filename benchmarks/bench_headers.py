@@ -0,0 +1,54 @@
+"""
+Request header access benchmarks.
+
+Compares `RequestHeaders`, which indexes the raw ASGI header list on first lookup, with building a dict
+eagerly for every request. Run with ``python -m benchmarks.bench_headers``.
+"""
+from __future__ import annotations
+
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+from soie.requests import RequestHeaders
+
+RAW_HEADERS: List[Tuple[bytes, bytes]] = [
+    (b"host", b"api.example.com"),
+    (b"user-agent", b"Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0"),
+    (b"accept", b"application/json, text/plain, */*"),
+    (b"accept-language", b"en-US,en;q=0.9,zh-TW;q=0.8"),
+    (b"accept-encoding", b"gzip, deflate, br"),
+    (b"authorization", b"Bearer eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJzdWIiOiIxMjM0NTY3ODkwIn0"),
+    (b"content-type", b"application/json"),
+    (b"content-length", b"512"),
+    (b"origin", b"https://app.example.com"),
+    (b"referer", b"https://app.example.com/dashboard"),
+    (b"cookie", b"session=abc123; theme=dark"),
+    (b"x-request-id", b"8c5c0d3e-2b4b-4d0c-9b3e-7f1e0f3c2a11"),
+    (b"x-forwarded-for", b"203.0.113.7, 198.51.100.2"),
+    (b"sec-fetch-mode", b"cors"),
+    (b"connection", b"keep-alive"),
+]
+NUMBER = 100_000
+
+
+def eager_dict(raw: List[Tuple[bytes, bytes]]) -> Dict[str, str]:
+    return {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in raw}
+
+
+CASES: Dict[str, Callable[[], object]] = {
+    "eager dict, never read": lambda: eager_dict(RAW_HEADERS),
+    "lazy view, never read": lambda: RequestHeaders(RAW_HEADERS),
+    "eager dict, one lookup": lambda: eager_dict(RAW_HEADERS).get("authorization"),
+    "lazy view, one lookup": lambda: RequestHeaders(RAW_HEADERS).get("authorization"),
+}
+
+
+def main() -> None:
+    print(f"{'case':>24} {'time (ns)':>10}")
+    for name, case in CASES.items():
+        elapsed = min(timeit.repeat(case, number=NUMBER, repeat=5)) / NUMBER
+        print(f"{name:>24} {elapsed * 1e9:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
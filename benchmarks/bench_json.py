@@ -0,0 +1,36 @@
+"""
+JSON backend benchmarks.
+
+Run with ``python -m benchmarks.bench_json``. Only the backends installed in the environment are measured.
+"""
+from __future__ import annotations
+
+import timeit
+from typing import Any, Dict
+
+from soie.encoders import JSON_ENCODERS
+
+PAYLOADS: Dict[str, Any] = {
+    "small object": {"id": 1, "name": "soie", "active": True, "score": 9.5, "tags": ["web", "async"]},
+    "list of 100 records": [
+        {"id": i, "name": f"user-{i}", "email": f"user{i}@example.com", "balance": i * 1.25, "roles": ["member"]}
+        for i in range(100)
+    ],
+    "nested document": {
+        "meta": {"page": 1, "per_page": 50, "total": 5000},
+        "data": [{"id": i, "attributes": {"title": "標題" * 5, "values": list(range(20))}} for i in range(50)],
+    },
+}
+
+
+def main() -> None:
+    print(f"{'payload':>22} {'backend':>8} {'time (µs)':>10}")
+    for payload_name, payload in PAYLOADS.items():
+        number = 2_000
+        for backend, encoder in JSON_ENCODERS.items():
+            elapsed = min(timeit.repeat(lambda: encoder(payload), number=number, repeat=5)) / number
+            print(f"{payload_name:>22} {backend:>8} {elapsed * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
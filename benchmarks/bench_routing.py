@@ -0,0 +1,47 @@
+"""
+Route lookup benchmarks.
+
+Run with ``python -m benchmarks.bench_routing``.
+"""
+from __future__ import annotations
+
+import timeit
+
+from soie.requests import Request
+from soie.responses import PlainTextResponse
+from soie.routing import Route, Router
+
+ROUTE_COUNTS = (10, 100, 1_000, 10_000)
+NUMBER = 100_000
+
+
+async def view(request: Request) -> PlainTextResponse:
+    return PlainTextResponse()
+
+
+def build_static_router(count: int) -> Router:
+    router = Router()
+    for i in range(count):
+        router.add_route(Route(f"/api/v1/resource{i}/items", view))
+    return router
+
+
+def bench_static_lookup(count: int, use_index: bool = True) -> float:
+    router = build_static_router(count)
+    if not use_index:
+        router.static_routes.clear()
+    request = Request({"type": "http", "path": f"/api/v1/resource{count // 2}/items"}, None)  # type: ignore
+    assert router.search(request) is not None
+    return min(timeit.repeat(lambda: router.search(request), number=NUMBER, repeat=5)) / NUMBER
+
+
+def main() -> None:
+    print(f"{'routes':>8} {'static index (ns)':>20} {'radix walk (ns)':>20}")
+    for count in ROUTE_COUNTS:
+        indexed = bench_static_lookup(count) * 1e9
+        walked = bench_static_lookup(count, use_index=False) * 1e9
+        print(f"{count:>8} {indexed:>20.1f} {walked:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
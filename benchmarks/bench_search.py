@@ -0,0 +1,100 @@
+"""
+Radix tree matching benchmarks for deep routes.
+
+Compares `search_node`, which walks the tree with an offset into the original path, and the matcher
+generated by `compile_tree` against the previous implementation that sliced the remaining path at
+every node.
+
+Run with ``python -m benchmarks.bench_search``.
+"""
+from __future__ import annotations
+
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, Optional
+
+from soie.responses import PlainTextResponse
+from soie.routing import Route, Router
+from soie.routing.routers import RadixTreeNode, compile_tree, search_node
+
+NUMBER = 50_000
+DEPTHS = (8, 12, 16)
+
+
+async def view(request: Any) -> PlainTextResponse:
+    return PlainTextResponse()
+
+
+def legacy_search(root: RadixTreeNode, path: str, params: Dict[str, Any]) -> Optional[Route]:
+    stack = [(path, root)]
+    while stack:
+        path, node = stack.pop()
+        if node.convertor is None:
+            if not path.startswith(node.characters):
+                continue
+            length = len(node.characters)
+        else:
+            try:
+                matched_var = node.convertor.regex.match(path).group()  # type: ignore
+            except AttributeError:
+                continue
+            length = len(matched_var)
+            params[node.characters] = node.convertor.to_python(matched_var)
+        if length == len(path):
+            return node.route
+        path = path[length:]
+        for child in node.children or ():
+            stack.append((path, child))
+    return None
+
+
+def offset_search(root: RadixTreeNode, path: str, params: Dict[str, Any]) -> Optional[Route]:
+    return search_node(root, path, 0, len(path), params)
+
+
+def build(depth: int) -> tuple[Router, str]:
+    """
+    A route with `depth` segments alternating static and int params, plus siblings at every level.
+    """
+    router = Router()
+    segments = []
+    real_segments = []
+    for i in range(depth):
+        if i % 2:
+            segments.append(f"{{p{i}:int}}")
+            real_segments.append(str(1_000_000 + i))
+        else:
+            segments.append(f"collection-segment-{i}")
+            real_segments.append(f"collection-segment-{i}")
+        router.add_route(Route("/" + "/".join(segments) + "/sibling", view))
+    router.add_route(Route("/" + "/".join(segments), view))
+    return router, "/" + "/".join(real_segments)
+
+
+def peak_memory(search: Callable[..., Optional[Route]], root: RadixTreeNode, path: str) -> int:
+    search(root, path, {})
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    search(root, path, {})
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main() -> None:
+    print(f"{'depth':>6} {'impl':>8} {'latency (ns)':>14} {'peak alloc (B)':>16}")
+    for depth in DEPTHS:
+        router, path = build(depth)
+        compiled = compile_tree(router.root)
+
+        def compiled_search(root: RadixTreeNode, path: str, params: Dict[str, Any]) -> Optional[Route]:
+            return compiled(path, params)
+
+        for name, search in (("legacy", legacy_search), ("offset", offset_search), ("compiled", compiled_search)):
+            assert search(router.root, path, {}) is not None
+            latency = min(timeit.repeat(lambda: search(router.root, path, {}), number=NUMBER, repeat=5)) / NUMBER
+            print(f"{depth:>6} {name:>8} {latency * 1e9:>14.1f} {peak_memory(search, router.root, path):>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+The benchmark suite behind ``python -m benchmarks``.
+
+Every case is a function returning the best time per operation in seconds. Coroutines are driven with
+`run_sync`: with in-memory `receive` / `send` stubs nothing in the request path suspends, so no event loop
+overhead ends up in the numbers.
+"""
+from __future__ import annotations
+
+import json
+import platform
+import re
+import sys
+import time
+import timeit
+from typing import Any, Callable, Coroutine, Dict, Iterable, List, NamedTuple, Optional
+
+from soie.applications import Soie
+from soie.requests import Request
+from soie.responses import JSONResponse, PlainTextResponse, Response
+from soie.routing import Route, Router
+from soie.routing.routers import RadixTreeNode, insert_node
+
+from .bench_json import PAYLOADS
+
+ROUTE_COUNTS = (10, 1_000, 10_000)
+REPEAT = 5
+
+Case = Callable[[float], float]
+CASES: Dict[str, Case] = {}
+
+
+def case(name: str) -> Callable[[Case], Case]:
+    def register(func: Case) -> Case:
+        CASES[name] = func
+        return func
+
+    return register
+
+
+def run_sync(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coroutine.close()
+    raise RuntimeError("The benchmarked coroutine suspended, it needs an event loop.")
+
+
+def measure(func: Callable[[], Any], number: int) -> float:
+    func()
+    return min(timeit.repeat(func, number=number, repeat=REPEAT)) / number
+
+
+async def view(request: Request) -> PlainTextResponse:
+    return PlainTextResponse()
+
+
+def mixed_paths(count: int) -> List[str]:
+    """
+    Half static, half parameterized route paths, spread over a few prefixes like a real API.
+    """
+    paths = []
+    for i in range(count):
+        prefix = f"/api/v{i % 3}/resource{i // 2}"
+        paths.append(f"{prefix}/items" if i % 2 == 0 else f"{prefix}/{{id:int}}/items/{{name}}")
+    return paths
+
+
+def build_router(count: int) -> Router:
+    router = Router(Route(path, view) for path in mixed_paths(count))
+    router.compile()
+    return router
+
+
+def search_case(count: int, static: bool) -> Case:
+    def bench(scale: float) -> float:
+        router = build_router(count)
+        # Even indexes are static routes, odd ones parameterized.
+        index = count // 2 & ~1 if static else count // 2 | 1
+        path = mixed_paths(count)[index].replace("{id:int}", "42").replace("{name}", "soie")
+        request = Request({"type": "http", "path": path}, None)  # type: ignore
+        assert router.search(request) is not None, path
+        return measure(lambda: router.search(request), int(100_000 * scale) or 1)
+
+    return bench
+
+
+def insert_case(count: int) -> Case:
+    def bench(scale: float) -> float:
+        routes = [Route(path, view) for path in mixed_paths(count)]
+
+        def build() -> None:
+            root = RadixTreeNode("/")
+            for route in routes:
+                insert_node(root, route.compiled_path[1:], route.param_convertors)
+
+        return measure(build, max(1, int(100_000 * scale) // count))
+
+    return bench
+
+
+for _count in ROUTE_COUNTS:
+    case(f"router.search/{_count}/static")(search_case(_count, static=True))
+    case(f"router.search/{_count}/param")(search_case(_count, static=False))
+    case(f"insert_node/{_count}")(insert_case(_count))
+
+
+async def receive() -> Dict[str, Any]:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message: Dict[str, Any]) -> None:
+    pass
+
+
+def app_case(path: str) -> Case:
+    def bench(scale: float) -> float:
+        app = Soie()
+
+        @app.router.http.get("/plaintext")
+        async def plaintext(request: Request) -> Response:
+            return PlainTextResponse("Hello, world!")
+
+        @app.router.http.get("/json")
+        async def json_view(request: Request) -> Response:
+            return JSONResponse({"message": "Hello, world!"})
+
+        @app.router.http.get("/users/{id:int}")
+        async def user(request: Request) -> Response:
+            return JSONResponse({"id": request.path_params["id"]})
+
+        app.router.compile()
+        headers = [(b"host", b"localhost"), (b"user-agent", b"bench"), (b"accept", b"*/*")]
+
+        def call() -> None:
+            scope = {"type": "http", "method": "GET", "path": path, "headers": headers, "query_string": b""}
+            run_sync(app(scope, receive, send))
+
+        return measure(call, int(20_000 * scale) or 1)
+
+    return bench
+
+
+case("app.call/plaintext")(app_case("/plaintext"))
+case("app.call/json")(app_case("/json"))
+case("app.call/param")(app_case("/users/42"))
+
+
+def serialize_case(factory: Callable[[], Response]) -> Case:
+    def bench(scale: float) -> float:
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+        return measure(lambda: run_sync(factory()(scope, receive, send)), int(20_000 * scale) or 1)
+
+    return bench
+
+
+_LARGE_TEXT = "soie " * 20_000
+_LARGE_JSON = PAYLOADS["list of 100 records"]
+case("serialize/plaintext/small")(serialize_case(lambda: PlainTextResponse("Hello, world!")))
+case("serialize/plaintext/large")(serialize_case(lambda: PlainTextResponse(_LARGE_TEXT)))
+case("serialize/json/small")(serialize_case(lambda: JSONResponse({"message": "Hello, world!"})))
+case("serialize/json/large")(serialize_case(lambda: JSONResponse(_LARGE_JSON)))
+
+
+def run(pattern: Optional[str] = None, scale: float = 1.0) -> Dict[str, Any]:
+    regex = re.compile(pattern) if pattern else None
+    results: Dict[str, float] = {}
+    for name, func in CASES.items():
+        if regex is None or regex.search(name):
+            results[name] = func(scale)
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": results,
+    }
+
+
+class Comparison(NamedTuple):
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return self.current / self.baseline - 1
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Comparison]:
+    """
+    Pair up the cases present in both runs.
+    """
+    baseline_results, current_results = baseline["results"], current["results"]
+    return [
+        Comparison(name, baseline_results[name], current_results[name])
+        for name in current_results
+        if name in baseline_results
+    ]
+
+
+def regressions(comparisons: Iterable[Comparison], threshold: float) -> List[Comparison]:
+    return [comparison for comparison in comparisons if comparison.change > threshold]
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def dump(report: Dict[str, Any], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def format_time(seconds: float) -> str:
+    for unit, factor in (("s", 1), ("ms", 1e3), ("µs", 1e6)):
+        if seconds * factor >= 1:
+            return f"{seconds * factor:.2f} {unit}"
+    return f"{seconds * 1e9:.1f} ns"
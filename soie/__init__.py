@@ -1,8 +1,14 @@
 from .applications import Soie
-from .routing import Route, Router
+from .middleware import Middleware
+from .routing import Route, Router, WebSocketRoute
+from .websockets import WebSocket, WebSocketGroup
 
 __all__ = [
     "Soie",
+    "Middleware",
     "Router",
     "Route",
+    "WebSocketRoute",
+    "WebSocket",
+    "WebSocketGroup",
 ]
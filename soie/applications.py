@@ -1,20 +1,58 @@
 from __future__ import annotations
 
+import asyncio
 import dataclasses
 import inspect
+import time
 import traceback
-from typing import Any, Awaitable, Callable, List, Optional, TypeVar, Union
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
 
 from typing_extensions import Literal, TypeAlias
 
-from .exceptions import HTTPException, http_exception_to_response
+from . import status
+from .encoders import JSONEncoder, get_json_encoder
+from .exceptions import (
+    HTTPException,
+    WebSocketDisconnect,
+    http_exception_to_response,
+    server_error_to_response,
+)
+from .metrics import ROUTE_SCOPE_KEY, Metrics
+from .middleware import CallNext, HTTPMiddleware, Middleware, wrap_http_middleware
 from .requests import Request
 from .responses import Response
-from .routing import Router
-from .types import Receive, Scope, Send
+from .routing import Route, Router
+from .types import ASGIApp, Message, Receive, Scope, Send
+from .websockets import WebSocket, WebSocketState
 
 
 class Soie:
+    """
+    `middleware` takes pure ASGI middlewares wrapped in `Middleware`, and request -> response middlewares
+    as plain `async def middleware(request, call_next)` functions. ASGI middlewares always run outside the
+    request -> response ones, each kind in the order given. The chain is built once, on the first call
+    (the lifespan startup under an ASGI server), and cannot be changed afterwards.
+
+    A request -> response middleware may change the response `call_next` returns. Shared prebuilt responses
+    (OPTIONS and 405 replies, HTTP errors, cache hits) are handed over as per-request copies, so a change
+    never leaks into other requests.
+
+    `metrics=True` (or a `Metrics` instance) records per-route counts and latencies, served in Prometheus
+    format at `metrics_path` unless it is None. Without it, requests take the uninstrumented path.
+    """
+
     def __init__(
         self,
         *,
@@ -23,36 +61,184 @@ class Soie:
         on_shutdown: List[LifeSpanHook] = None,
         router: Router = None,
         exception_handlers: Optional[ExceptionHandlers] = None,
+        max_body_size: Optional[int] = None,
+        json_backend: Union[str, JSONEncoder] = "stdlib",
+        middleware: Sequence[Union[Middleware, HTTPMiddleware]] = (),
+        concurrent_lifespan: bool = False,
+        metrics: Union[bool, Metrics] = False,
+        metrics_path: Optional[str] = "/metrics",
     ):
         self.debug = debug
-        self.lifespan = LifeSpan(on_startup or [], on_shutdown or [])
+        self.max_body_size = max_body_size
+        self.json_encoder = get_json_encoder(json_backend)
         if router is None:
             router = Router()
         self.router = router
+        # Compiled once every startup hook ran, so routes the hooks add are compiled too.
+        self.lifespan = LifeSpan(
+            on_startup or [], on_shutdown or [], concurrent=concurrent_lifespan, on_started=router.compile
+        )
         if exception_handlers is None:
             exception_handlers = {}
         self._exception_handlers: ExceptionHandlers = {HTTPException: http_exception_to_response} | exception_handlers
+        self._exception_handler_cache: Dict[type[BaseException], Optional[ExceptionHandler]] = {}
+        self.asgi_middleware: List[Middleware] = []
+        self.http_middleware: List[HTTPMiddleware] = []
+        self.middleware_stack: Optional[ASGIApp] = None
+        self._http_middleware_chain: Optional[CallNext] = None
+        for item in middleware:
+            if isinstance(item, Middleware):
+                self.asgi_middleware.append(item)
+            else:
+                self.http_middleware.append(item)
+        self.metrics: Optional[Metrics] = None
+        if metrics:
+            self.metrics = metrics if isinstance(metrics, Metrics) else Metrics()
+            self.http = self.metered_http  # type: ignore[assignment]
+            if metrics_path is not None:
+                self.router.add_route(Route(metrics_path, self.metrics.view, ("GET",)))
 
     async def app(self, scope: Scope, receive: Receive, send: Send) -> None:
         scope_type: Literal["lifespan", "http", "websocket"] = scope["type"]
         return await getattr(self, scope_type)(scope, receive, send)
 
     async def http(self, scope: Scope, receive: Receive, send: Send) -> None:
-        async with ASGIContextManager(scope, receive, send, self._exception_handlers) as request:
+        context = ASGIContextManager(scope, receive, send, self.lookup_exception_handler)
+        async with context as request:
+            if self._http_middleware_chain is None:
+                route = self.router.get_route(request)
+                request.max_body_size = self.max_body_size if route.max_body_size is None else route.max_body_size
+                response = await route.get_endpoint(request.method)(request)
+            else:
+                response = await self._http_middleware_chain(request)
+            await response(scope, receive, context.send)
+
+    async def dispatch(self, request: Request) -> Response:
+        route = self.router.get_route(request)
+        request.max_body_size = self.max_body_size if route.max_body_size is None else route.max_body_size
+        return await route.get_endpoint(request.method)(request)
+
+    async def metered_http(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        `http` with the time spent routing, in the handler and sending the response recorded per route.
+        """
+        status_code = 500
+
+        async def metered_send(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        handled = None
+        try:
+            context = ASGIContextManager(scope, receive, metered_send, self.lookup_exception_handler)
+            async with context as request:
+                try:
+                    response = await (self._http_middleware_chain or self.metered_dispatch)(request)
+                finally:
+                    # Building and sending the response for an exception counts as sending.
+                    handled = time.perf_counter()
+                await response(scope, receive, context.send)
+        finally:
+            finished = time.perf_counter()
+            if handled is None:
+                handled = finished
+            route, routing = scope.get(ROUTE_SCOPE_KEY, (None, 0.0))
+            cast(Metrics, self.metrics).observe(
+                "" if route is None else route.path,
+                status_code,
+                routing,
+                handled - started - routing,
+                finished - handled,
+            )
+
+    async def metered_dispatch(self, request: Request) -> Response:
+        started = time.perf_counter()
+        route = None
+        try:
             route = self.router.get_route(request)
-            response = await route.endpoint(request)
-            await response(scope, receive, send)
+        finally:
+            request.scope[ROUTE_SCOPE_KEY] = (route, time.perf_counter() - started)
+        request.max_body_size = self.max_body_size if route.max_body_size is None else route.max_body_size
+        return await route.get_endpoint(request.method)(request)
 
     async def websocket(self, scope: Scope, receive: Receive, send: Send) -> None:
-        raise NotImplementedError
+        """
+        Unknown paths are rejected at the handshake. An endpoint that raises has its connection closed with
+        1011 and the exception propagated to the server, a client disconnect ends the endpoint quietly.
+        """
+        websocket = WebSocket(scope, receive, send)
+        route = self.router.search_websocket(websocket)
+        if route is None:
+            await websocket.close()
+            return
+        try:
+            await route.endpoint(websocket)
+        except WebSocketDisconnect:
+            pass
+        except Exception:
+            if websocket.state is not WebSocketState.DISCONNECTED:
+                await websocket.close(status.WS_1011_INTERNAL_ERROR)
+            raise
+        else:
+            await websocket.close()
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         scope["app"] = self
 
-        await self.app(scope, receive, send)
+        if self.middleware_stack is None:
+            self.middleware_stack = self.build_middleware_stack()
+        await self.middleware_stack(scope, receive, send)
+
+    def build_middleware_stack(self) -> ASGIApp:
+        if self.http_middleware:
+            chain: CallNext = self.dispatch if self.metrics is None else self.metered_dispatch
+            for http_middleware in reversed(self.http_middleware):
+                chain = wrap_http_middleware(http_middleware, chain)
+            self._http_middleware_chain = chain
+        app: ASGIApp = self.app
+        for middleware in reversed(self.asgi_middleware):
+            app = middleware.factory(app, **middleware.options)
+        return app
+
+    def add_middleware(self, factory: Callable[..., ASGIApp], **options: Any) -> None:
+        self._check_middleware_mutable()
+        self.asgi_middleware.append(Middleware(factory, **options))
+
+    def add_http_middleware(self, middleware: HTTPMiddleware) -> HTTPMiddleware:
+        self._check_middleware_mutable()
+        self.http_middleware.append(middleware)
+        return middleware
+
+    def _check_middleware_mutable(self) -> None:
+        if self.middleware_stack is not None:
+            raise RuntimeError("Cannot add middleware after the application has started.")
+
+    @property
+    def lifespan_timings(self) -> Dict[str, Dict[str, float]]:
+        return self.lifespan.timings
 
     def add_exception_handler(self, exc_type: type[BaseException], handler: ExceptionHandler) -> None:
         self._exception_handlers[exc_type] = handler
+        self._exception_handler_cache.clear()
+
+    def lookup_exception_handler(self, exc_type: type[BaseException]) -> Optional[ExceptionHandler]:
+        """
+        Return the handler registered for the nearest class in `exc_type`'s MRO, memoized per type.
+        """
+        try:
+            return self._exception_handler_cache[exc_type]
+        except KeyError:
+            pass
+        handler = None
+        for cls in exc_type.__mro__:
+            if cls in self._exception_handlers:
+                handler = self._exception_handlers[cls]
+                break
+        self._exception_handler_cache[exc_type] = handler
+        return handler
 
     def exception_handler(self, exc_type: type[BaseException]) -> Callable[[ExceptionHandler], ExceptionHandler]:
         def decorator(handler: ExceptionHandler) -> ExceptionHandler:
@@ -62,22 +248,57 @@ class Soie:
         return decorator
 
 
-LifeSpanHook: TypeAlias = Union[Callable[[], Any], Callable[[], Awaitable[Any]]]
+LifeSpanHandler: TypeAlias = Union[Callable[[], Any], Callable[[], Awaitable[Any]]]
+
+
+@dataclasses.dataclass
+class Hook:
+    """
+    A lifespan handler with an optional timeout (seconds, for async handlers), an ordering group and a
+    `name` for its timing, by default the handler's qualified name.
+
+    Groups run in ascending order, each one finishing before the next starts.
+    """
+
+    handler: LifeSpanHandler
+    timeout: Optional[float] = None
+    group: int = 0
+    name: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        if self.name is not None:
+            return self.name
+        return getattr(self.handler, "__qualname__", repr(self.handler))
+
+
+LifeSpanHook: TypeAlias = Union[Hook, LifeSpanHandler]
 
 
 @dataclasses.dataclass
 class LifeSpan:
+    """
+    Run startup and shutdown hooks, one by one or, with `concurrent=True`, every hook of the same group at
+    once. The seconds each hook took are kept in `timings["startup"]` / `timings["shutdown"]`, by hook
+    name; hooks sharing a name, like bound methods of two instances or lambdas, get their position in the
+    list appended, e.g. `Pool.open[0]` and `Pool.open[1]`.
+
+    `on_started` is called once all the startup hooks are done, before startup is reported complete.
+    """
+
     on_startup: List[LifeSpanHook] = dataclasses.field(default_factory=list)
     on_shutdown: List[LifeSpanHook] = dataclasses.field(default_factory=list)
+    concurrent: bool = False
+    timings: Dict[str, Dict[str, float]] = dataclasses.field(default_factory=lambda: {"startup": {}, "shutdown": {}})
+    on_started: Optional[Callable[[], None]] = None
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         message = await receive()
         assert message["type"] == "lifespan.startup"
         try:
-            for handler in self.on_startup:
-                result = handler()
-                if inspect.isawaitable(result):
-                    await result
+            await self.run_hooks(self.on_startup, self.timings["startup"])
+            if self.on_started is not None:
+                self.on_started()
         except BaseException:
             msg = traceback.format_exc()
             await send({"type": "lifespan.startup.failed", "message": msg})
@@ -87,16 +308,47 @@ class LifeSpan:
         message = await receive()
         assert message["type"] == "lifespan.shutdown"
         try:
-            for handler in self.on_shutdown:
-                result = handler()
-                if inspect.isawaitable(result):
-                    await result
+            await self.run_hooks(self.on_shutdown, self.timings["shutdown"])
         except BaseException:
             msg = traceback.format_exc()
             await send({"type": "lifespan.shutdown.failed", "message": msg})
             raise
         await send({"type": "lifespan.shutdown.completed"})
 
+    async def run_hooks(self, hooks: List[LifeSpanHook], timings: Dict[str, float]) -> None:
+        wrapped = [hook if isinstance(hook, Hook) else Hook(hook) for hook in hooks]
+        labels = [hook.label for hook in wrapped]
+        counts: Dict[str, int] = {}
+        for label in labels:
+            counts[label] = counts.get(label, 0) + 1
+        groups: Dict[int, List[Tuple[Hook, str]]] = {}
+        for index, (hook, label) in enumerate(zip(wrapped, labels)):
+            if counts[label] > 1:
+                label = f"{label}[{index}]"
+            groups.setdefault(hook.group, []).append((hook, label))
+
+        for group in sorted(groups):
+            if not self.concurrent:
+                for hook, label in groups[group]:
+                    await self.run_hook(hook, label, timings)
+                continue
+            tasks = [asyncio.ensure_future(self.run_hook(hook, label, timings)) for hook, label in groups[group]]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+
+    async def run_hook(self, hook: Hook, label: str, timings: Dict[str, float]) -> None:
+        start = time.perf_counter()
+        try:
+            result = hook.handler()
+            if inspect.isawaitable(result):
+                await asyncio.wait_for(result, hook.timeout)
+        finally:
+            timings[label] = time.perf_counter() - start
+
 
 E = TypeVar("E", bound=BaseException)
 ExceptionHandler = Callable[[Request, E], Awaitable[Response]]
@@ -104,18 +356,32 @@ ExceptionHandlers = dict[type[BaseException], ExceptionHandler[BaseException]]
 
 
 class ASGIContextManager:
+    """
+    Turn exceptions raised while handling a request into responses.
+
+    Exceptions without a handler are answered with a 500 and re-raised, so the server still logs them.
+    Responses must be sent through `send`: once `http.response.start` has gone out another response cannot
+    follow, so an exception raised after that is only re-raised.
+    """
+
     def __init__(
         self,
         scope: Scope,
         receive: Receive,
         send: Send,
-        exception_handlers: ExceptionHandlers,
+        lookup_exception_handler: Callable[[type[BaseException]], Optional[ExceptionHandler]],
     ):
         self._scope = scope
         self._receive = receive
         self._send = send
         self.request = Request(scope, receive)
-        self.exception_handlers = exception_handlers
+        self.lookup_exception_handler = lookup_exception_handler
+        self.response_started = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.response_started = True
+        await self._send(message)
 
     async def __aenter__(self) -> Request:
         return self.request
@@ -123,9 +389,14 @@ class ASGIContextManager:
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> bool:
         if exc_type is None:
             return True
-        convertor = self.exception_handlers.get(exc_type)
-        if convertor is None:
+        if self.response_started:
             return False
-        response = await convertor(self.request, exc_val)
-        await response(self._scope, self._receive, self._send)
-        return True
+        convertor = self.lookup_exception_handler(exc_type)
+        if convertor is not None:
+            response = await convertor(self.request, exc_val)
+            await response(self._scope, self._receive, self._send)
+            return True
+        if issubclass(exc_type, Exception):
+            response = await server_error_to_response(self.request, exc_val)
+            await response(self._scope, self._receive, self._send)
+        return False
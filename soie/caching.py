@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Collection, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode
+
+from . import status
+from .requests import Request
+from .responses import FileResponse, PrebuiltResponse, Response, StreamingResponse
+from .views import View
+
+
+class ResponseCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    max_bytes: int
+    current_bytes: int
+    entries: int
+
+
+class ResponseCache:
+    """
+    In-process cache of GET responses, used as a view decorator:
+
+        cache = ResponseCache(ttl=30, query_params=("page",))
+
+        @router.http.get("/items")
+        @cache
+        async def items(request): ...
+
+    Entries are keyed by the request path, the listed `query_params` and the listed `headers`, so a key
+    always starts with its path and `invalidate` can drop a whole subtree by prefix. They are stored as
+    `PrebuiltResponse` (body bytes and rendered headers), live `ttl` seconds and are evicted least
+    recently used first once they take more than `max_bytes`.
+
+    Only 200 responses with the body in memory and no cookies are stored. While a key is being computed,
+    other requests for it wait for that computation instead of running the view again.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl: float = 60.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        query_params: Collection[str] = (),
+        headers: Collection[str] = (),
+    ) -> None:
+        if ttl <= 0:
+            raise ValueError("ttl must be positive.")
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be a positive integer.")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.query_params = tuple(sorted(query_params))
+        self.headers = tuple(sorted(header.lower() for header in headers))
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._entries: OrderedDict[str, Tuple[float, int, PrebuiltResponse]] = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future[Optional[PrebuiltResponse]]] = {}
+
+    def __call__(self, view: View) -> View:
+        @wraps(view)
+        async def cached_view(request: Request) -> Response:
+            if request.method not in ("GET", "HEAD"):
+                return await view(request)
+            key = self.make_key(request)
+            while True:
+                response = self.get(key)
+                if response is not None:
+                    self.hits += 1
+                    return response
+                future = self._inflight.get(key)
+                if future is None:
+                    self.misses += 1
+                    return await self._compute(key, view, request)
+                try:
+                    response = await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    if not future.cancelled():
+                        raise
+                    # The computing request was cancelled, try again.
+                    continue
+                if response is None:
+                    # Not cacheable, every request needs its own response.
+                    return await view(request)
+                self.hits += 1
+                return response
+
+        return cached_view
+
+    def make_key(self, request: Request) -> str:
+        key = request["path"]
+        if self.query_params:
+            query_params = request.query_params
+            key += "?" + urlencode(
+                [(name, value) for name in self.query_params for value in query_params.getlist(name)]
+            )
+        if self.headers:
+            headers = request.headers
+            key += "".join(f"\n{name}:{headers.get(name, '')}" for name in self.headers)
+        return key
+
+    def get(self, key: str) -> Optional[PrebuiltResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, size, response = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.current_bytes -= size
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def set(self, key: str, response: PrebuiltResponse) -> None:
+        size = len(key) + len(response.content) + sum(len(name) + len(value) for name, value in response.raw)
+        if size > self.max_bytes:
+            return
+        self._discard(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, response)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+
+    def invalidate(self, prefix: str = "") -> int:
+        """
+        Drop every entry whose key starts with `prefix`, all of them by default. Return how many were dropped.
+        """
+        keys = [key for key in self._entries if key.startswith(prefix)]
+        for key in keys:
+            self._discard(key)
+        return len(keys)
+
+    def cache_info(self) -> ResponseCacheInfo:
+        return ResponseCacheInfo(
+            self.hits, self.misses, self.evictions, self.max_bytes, self.current_bytes, len(self._entries)
+        )
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+    async def _compute(self, key: str, view: View, request: Request) -> Response:
+        future: asyncio.Future[Optional[PrebuiltResponse]] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await view(request)
+            prebuilt = None
+            if cacheable(response):
+                prebuilt = await response.freeze(request.scope)
+                self.set(key, prebuilt)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark it retrieved, nobody may be waiting.
+            future.exception()
+            raise
+        else:
+            future.set_result(prebuilt)
+        finally:
+            del self._inflight[key]
+        return response if prebuilt is None else prebuilt
+
+
+def cacheable(response: Response) -> bool:
+    return (
+        response.status_code == status.HTTP_200_OK
+        and not response.cookies
+        and not isinstance(response, (StreamingResponse, FileResponse))
+    )
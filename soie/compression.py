@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .types import ASGIApp, Message, Receive, Scope, Send
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+#: Scope key under which `CompressionMiddleware` leaves `(encoding, level, minimum_size)` for responses
+#: that can compress themselves, such as `PrebuiltResponse`.
+COMPRESSION_SCOPE_KEY = "soie.compression"
+
+_WBITS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+_COMPRESSIBLE_TYPES = (b"text/", b"application/json", b"application/javascript", b"application/xml")
+_NEGOTIATION_CACHE_SIZE = 256
+
+
+class CompressionMiddleware:
+    """
+    Compress HTTP response bodies with gzip or deflate, as negotiated from `Accept-Encoding`.
+
+    Only textual media types (text/*, JSON, JavaScript, XML and their +json / +xml variants) at least
+    `minimum_size` bytes long are compressed. Streaming bodies are compressed chunk by chunk, each chunk
+    flushed so the client still receives it right away. Responses that are already encoded, partial (206)
+    or sent with `http.response.pathsend` pass through untouched. Every response that could have been
+    compressed carries `Vary: Accept-Encoding`, whether it was or not.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int = 500,
+        level: int = 6,
+        encodings: Sequence[str] = ("gzip", "deflate"),
+    ) -> None:
+        if not -1 <= level <= 9:
+            raise ValueError("level must be between -1 and 9.")
+        unknown = set(encodings) - _WBITS.keys()
+        if unknown:
+            raise ValueError(f"Unsupported encodings: {', '.join(sorted(unknown))}.")
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+        self.encodings = tuple(encodings)
+        self._negotiated: Dict[str, Optional[str]] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        encoding = None
+        if scope.get("method") != "HEAD":
+            for key, value in scope.get("headers", ()):
+                if key.lower() == b"accept-encoding":
+                    encoding = self.negotiate(value.decode("latin-1"))
+                    break
+        if encoding is not None:
+            scope[COMPRESSION_SCOPE_KEY] = (encoding, self.level, self.minimum_size)
+        responder = CompressionResponder(send, encoding, self.level, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+    def negotiate(self, accept_encoding: str) -> Optional[str]:
+        """
+        Return the supported encoding with the highest q-value in `accept_encoding`, ties going to the
+        first one in `encodings`, or None if none is acceptable.
+        """
+        try:
+            return self._negotiated[accept_encoding]
+        except KeyError:
+            pass
+        qualities: Dict[str, float] = {}
+        for item in accept_encoding.split(","):
+            name, _, params = item.partition(";")
+            name = name.strip().lower()
+            quality = 1.0
+            params = params.strip()
+            if params.startswith(("q=", "Q=")):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            qualities[name] = quality
+        wildcard = qualities.get("*", 0.0)
+        best, best_quality = None, 0.0
+        for encoding in self.encodings:
+            quality = qualities.get(encoding, wildcard)
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+
+        if len(self._negotiated) >= _NEGOTIATION_CACHE_SIZE:
+            self._negotiated.clear()
+        self._negotiated[accept_encoding] = best
+        return best
+
+
+class CompressionResponder:
+    """
+    The `send` of one response going through `CompressionMiddleware`. `http.response.start` is held back
+    until the first body message shows whether, and how, the body is compressed.
+    """
+
+    __slots__ = ("_send", "encoding", "level", "minimum_size", "_start", "_compressor", "_passthrough")
+
+    def __init__(self, send: Send, encoding: Optional[str], level: int, minimum_size: int) -> None:
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self._start: Optional[Message] = None
+        self._compressor = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if self._passthrough:
+            return await self._send(message)
+
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            self._start = message
+            return
+        start = self._start
+        if start is None:
+            # Only the rest of a compressed stream can get here.
+            return await self._send(self._compress_chunk(message))
+        self._start = None
+
+        headers: RawHeaders = list(start.get("headers", ()))
+        if message_type != "http.response.body" or not compressible(start["status"], headers):
+            self._passthrough = True
+            if start["status"] == 304:
+                start = {**start, "headers": not_modified_headers(headers, self.encoding)}
+            await self._send(start)
+            return await self._send(message)
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        encoding = self.encoding
+        if encoding is None or (not more_body and len(body) < self.minimum_size):
+            self._passthrough = True
+            await self._send({**start, "headers": vary_headers(headers)})
+            return await self._send(message)
+
+        if more_body:
+            self._compressor = zlib.compressobj(self.level, zlib.DEFLATED, _WBITS[encoding])
+            await self._send({**start, "headers": encoded_headers(headers, encoding, None)})
+            return await self._send(self._compress_chunk(message))
+        body = compress(body, encoding, self.level)
+        await self._send({**start, "headers": encoded_headers(headers, encoding, len(body))})
+        await self._send({**message, "body": body})
+
+    def _compress_chunk(self, message: Message) -> Message:
+        compressor = self._compressor
+        if compressor is None or message["type"] != "http.response.body":
+            return message
+        more_body = message.get("more_body", False)
+        body = compressor.compress(message.get("body", b""))
+        body += compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+        return {**message, "body": body}
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _WBITS[encoding])
+    return compressor.compress(body) + compressor.flush()
+
+
+def compressible(status_code: int, headers: RawHeaders) -> bool:
+    """
+    Whether a response with these raw headers may have its body compressed.
+    """
+    if status_code < 200 or status_code in (204, 206, 304):
+        return False
+    content_type = None
+    for key, value in headers:
+        key = key.lower()
+        if key == b"content-encoding" or key == b"content-range":
+            return False
+        if key == b"content-type":
+            content_type = value.lower()
+    if content_type is None:
+        return False
+    media_type = content_type.partition(b";")[0].strip()
+    return media_type.startswith(_COMPRESSIBLE_TYPES) or media_type.endswith((b"+json", b"+xml"))
+
+
+def vary_headers(headers: RawHeaders) -> RawHeaders:
+    """
+    Return `headers` with `Accept-Encoding` added to `Vary`.
+    """
+    for index, (key, value) in enumerate(headers):
+        if key.lower() == b"vary":
+            tokens = [token.strip().lower() for token in value.split(b",")]
+            if b"accept-encoding" in tokens or b"*" in tokens:
+                return headers
+            headers = headers.copy()
+            headers[index] = (key, value + b", Accept-Encoding")
+            return headers
+    return [*headers, (b"vary", b"Accept-Encoding")]
+
+
+def weaken_etag(headers: RawHeaders) -> RawHeaders:
+    return [
+        (key, b"W/" + value if key.lower() == b"etag" and not value.startswith(b"W/") else value)
+        for key, value in headers
+    ]
+
+
+def not_modified_headers(headers: RawHeaders, encoding: Optional[str]) -> RawHeaders:
+    """
+    Return the headers of a 304 as they are on the 200 it stands for: with `Vary: Accept-Encoding` and,
+    when an encoding was negotiated, a weakened ETag.
+    """
+    if encoding is not None:
+        headers = weaken_etag(headers)
+    return vary_headers(headers)
+
+
+def encoded_headers(headers: RawHeaders, encoding: str, content_length: Optional[int]) -> RawHeaders:
+    """
+    Return `headers` for a body compressed with `encoding`, `content_length` is None for a stream. A strong
+    ETag is weakened, the compressed bytes are not the ones it was computed for.
+    """
+    result = [(key, value) for key, value in weaken_etag(headers) if key.lower() != b"content-length"]
+    if content_length is not None:
+        result.append((b"content-length", str(content_length).encode("latin-1")))
+    result.append((b"content-encoding", encoding.encode("latin-1")))
+    return vary_headers(result)
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+from typing import Any, AsyncIterator, Callable, Iterable, TypeVar
+
+_T = TypeVar("_T")
+_STOP = object()
+
+
+async def run_in_threadpool(func: Callable[..., _T], *args: Any) -> _T:
+    """
+    Run a blocking function in the event loop's default executor.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args))
+
+
+async def iterate_in_threadpool(iterable: Iterable[_T]) -> AsyncIterator[_T]:
+    """
+    Iterate a blocking iterable without blocking the event loop, one `next` call per executor job.
+    """
+    iterator = iter(iterable)
+    while True:
+        item = await run_in_threadpool(next, iterator, _STOP)
+        if item is _STOP:
+            break
+        yield item  # type: ignore
@@ -0,0 +1,63 @@
+"""
+JSON encoders turning a jsonable value into UTF-8 bytes.
+
+The standard library encoder is the default. `orjson` and `ujson` are opt-in (`pip install soie[orjson]`,
+then `Soie(json_backend="orjson")`), and `get_json_encoder("auto")` picks the fastest one installed, falling
+back to the standard library. They produce the same bytes for ordinary content, but differ at the edges:
+
+- orjson encodes NaN and infinities as `null` where the standard library raises ValueError, and raises
+  TypeError for integers that do not fit in 64 bits, which the standard library encodes.
+- ujson may format floats differently, and depending on its version handles NaN differently too.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, Union
+
+JSONEncoder = Callable[[Any], bytes]
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+
+def stdlib_json_dumps(content: Any) -> bytes:
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"), default=None
+    ).encode("utf-8")
+
+
+def orjson_dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def ujson_dumps(content: Any) -> bytes:
+    return ujson.dumps(content, ensure_ascii=False, escape_forward_slashes=False).encode("utf-8")
+
+
+JSON_ENCODERS: Dict[str, JSONEncoder] = {"stdlib": stdlib_json_dumps}
+if ujson is not None:
+    JSON_ENCODERS["ujson"] = ujson_dumps
+if orjson is not None:
+    JSON_ENCODERS["orjson"] = orjson_dumps
+
+
+def get_json_encoder(backend: Union[str, JSONEncoder] = "stdlib") -> JSONEncoder:
+    if callable(backend):
+        return backend
+    if backend == "auto":
+        for name in ("orjson", "ujson", "stdlib"):
+            if name in JSON_ENCODERS:
+                return JSON_ENCODERS[name]
+    if backend not in JSON_ENCODERS:
+        raise ValueError(f"JSON backend '{backend}' is unknown or not installed.")
+    return JSON_ENCODERS[backend]
+
+
+default_json_encoder = get_json_encoder()
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import traceback
 from http import HTTPStatus
-from typing import Mapping, Optional
+from typing import Any, Dict, Mapping, Optional, Tuple
 
-from .responses import JSONResponse, Response
+from . import status
+from .encoders import JSONEncoder, default_json_encoder
+from .responses import JSONResponse, PlainTextResponse, PrebuiltResponse, Response
 
 
 class SoieException(Exception):
@@ -27,9 +30,59 @@ class HTTPException(SoieException):
         super().__init__(status_code, message)
 
 
-async def http_exception_to_response(_, exc: HTTPException) -> Response:
-    return JSONResponse(content=exc.message, status_code=exc.status_code, headers=exc.headers)
+async def http_exception_to_response(request: Any, exc: HTTPException) -> Response:
+    """
+    Exceptions without headers and with the default message are answered with a prebuilt response,
+    rendered once per status code and JSON encoder.
+    """
+    if exc.headers is not None or exc.message != _DESCRIPTIONS.get(exc.status_code):
+        return JSONResponse(content=exc.message, status_code=exc.status_code, headers=exc.headers)
+
+    json_encoder = _get_app_attribute(request, "json_encoder", default_json_encoder)
+    key = (exc.status_code, json_encoder)
+    response = _PREBUILT_RESPONSES.get(key)
+    if response is None:
+        response = await JSONResponse(exc.message, exc.status_code, json_encoder=json_encoder).freeze()
+        _PREBUILT_RESPONSES[key] = response
+    return response
+
+
+async def server_error_to_response(request: Any, exc: BaseException) -> Response:
+    """
+    Answer an unhandled exception with a 500. The traceback is only formatted into the body when the
+    application runs with `debug=True`.
+    """
+    if _get_app_attribute(request, "debug", False):
+        content = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+        return PlainTextResponse(content, status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return await http_exception_to_response(request, HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR))
+
+
+def _get_app_attribute(request: Any, name: str, default: Any) -> Any:
+    try:
+        return getattr(request["app"], name, default)
+    except (TypeError, KeyError):
+        return default
+
+
+_DESCRIPTIONS = {http_status.value: http_status.description for http_status in HTTPStatus}
+_PREBUILT_RESPONSES: Dict[Tuple[int, JSONEncoder], PrebuiltResponse] = {}
 
 
 class ParamNotMatched(SoieException):
     pass
+
+
+class ClientDisconnect(SoieException):
+    """Client disconnected before the request body was read"""
+
+    pass
+
+
+class WebSocketDisconnect(SoieException):
+    """Client closed the WebSocket connection"""
+
+    def __init__(self, code: int = status.WS_1000_NORMAL_CLOSURE, reason: Optional[str] = None) -> None:
+        self.code = code
+        self.reason = reason
+        super().__init__(code, reason)
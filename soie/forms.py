@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import re
+from tempfile import SpooledTemporaryFile
+from typing import (
+    IO,
+    AsyncIterable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
+from urllib.parse import parse_qsl, unquote
+
+from . import status
+from .concurrency import run_in_threadpool
+from .exceptions import HTTPException
+
+DEFAULT_MAX_PARTS = 1000
+DEFAULT_MAX_FIELD_SIZE = 1024 * 1024
+DEFAULT_SPOOL_MAX_SIZE = 1024 * 1024
+DEFAULT_MAX_URLENCODED_SIZE = 4 * 1024 * 1024
+MAX_PART_HEADER_SIZE = 16 * 1024
+
+
+class UploadFile:
+    """
+    A file sent in a multipart form. Its content is kept in memory up to `spool_max_size` bytes, then in a
+    temporary file; once on disk, reads and writes run in the thread pool.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        content_type: str = "application/octet-stream",
+        headers: Optional[Dict[str, str]] = None,
+        spool_max_size: int = DEFAULT_SPOOL_MAX_SIZE,
+    ) -> None:
+        self.filename = filename
+        self.content_type = content_type
+        self.headers = headers or {}
+        self.file = cast(IO[bytes], SpooledTemporaryFile(max_size=spool_max_size))
+        self.size = 0
+
+    @property
+    def in_memory(self) -> bool:
+        return not getattr(self.file, "_rolled", True)
+
+    async def write(self, data: bytes) -> None:
+        self.size += len(data)
+        if self.in_memory:
+            self.file.write(data)
+        else:
+            await run_in_threadpool(self.file.write, data)
+
+    async def read(self, size: int = -1) -> bytes:
+        if self.in_memory:
+            return self.file.read(size)
+        return await run_in_threadpool(self.file.read, size)
+
+    async def seek(self, offset: int) -> None:
+        if self.in_memory:
+            self.file.seek(offset)
+        else:
+            await run_in_threadpool(self.file.seek, offset)
+
+    async def close(self) -> None:
+        if self.in_memory:
+            self.file.close()
+        else:
+            await run_in_threadpool(self.file.close)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(filename={self.filename!r}, size={self.size})"
+
+
+class FormData(Mapping[str, Union[str, UploadFile]]):
+    """
+    Immutable multi-dict of form fields. `form[key]` and `get` return the last value of a repeated key,
+    `getlist` returns all of them. Call `close()` to release the uploaded files.
+    """
+
+    __slots__ = ("_items", "_lists")
+
+    def __init__(self, items: List[Tuple[str, Union[str, UploadFile]]]) -> None:
+        self._items = items
+        lists: Dict[str, List[Union[str, UploadFile]]] = {}
+        for key, value in items:
+            if key in lists:
+                lists[key].append(value)
+            else:
+                lists[key] = [value]
+        self._lists = lists
+
+    def getlist(self, key: str) -> List[Union[str, UploadFile]]:
+        return list(self._lists.get(key, ()))
+
+    def multi_items(self) -> List[Tuple[str, Union[str, UploadFile]]]:
+        return list(self._items)
+
+    async def close(self) -> None:
+        for _, value in self._items:
+            if isinstance(value, UploadFile):
+                await value.close()
+
+    def __getitem__(self, key: str) -> Union[str, UploadFile]:
+        return self._lists[key][-1]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._lists
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._lists)
+
+    def __len__(self) -> int:
+        return len(self._lists)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._items!r})"
+
+
+_OPTION_REGEX = re.compile(r';\s*([^\s=;]+)\s*=\s*("(?:\\.|[^"\\])*"|[^;]*)')
+
+
+def parse_options_header(value: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Split a header like `Content-Type` or `Content-Disposition` into its lowercased main value and params.
+    """
+    main, separator, rest = value.partition(";")
+    options: Dict[str, str] = {}
+    for name, option in _OPTION_REGEX.findall(separator + rest):
+        option = option.strip()
+        if len(option) > 1 and option[0] == option[-1] == '"':
+            option = re.sub(r"\\(.)", r"\1", option[1:-1])
+        options[name.lower()] = option
+    return main.strip().lower(), options
+
+
+async def parse_urlencoded(
+    stream: AsyncIterable[bytes],
+    *,
+    max_parts: int = DEFAULT_MAX_PARTS,
+    max_field_size: int = DEFAULT_MAX_FIELD_SIZE,
+    max_size: int = DEFAULT_MAX_URLENCODED_SIZE,
+) -> FormData:
+    """
+    Parse an `application/x-www-form-urlencoded` body field by field as it is received. Only the field
+    being received is buffered, and the limits are enforced while reading.
+    """
+    items: List[Tuple[str, Union[str, UploadFile]]] = []
+    pending = bytearray()
+    received = 0
+    async for chunk in stream:
+        received += len(chunk)
+        if received > max_size:
+            raise HTTPException(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        start = len(pending)
+        pending += chunk
+        index = pending.rfind(b"&", start)
+        if index != -1:
+            _parse_urlencoded_fields(bytes(pending[:index]), items, max_parts, max_field_size)
+            del pending[: index + 1]
+        # Percent-encoding at most triples the size of a value.
+        if len(pending) > 3 * max_field_size:
+            raise HTTPException(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    if pending:
+        _parse_urlencoded_fields(bytes(pending), items, max_parts, max_field_size)
+    return FormData(items)
+
+
+def _parse_urlencoded_fields(
+    data: bytes,
+    items: List[Tuple[str, Union[str, UploadFile]]],
+    max_parts: int,
+    max_field_size: int,
+) -> None:
+    try:
+        fields = parse_qsl(
+            data.decode("utf-8", "replace"), keep_blank_values=True, max_num_fields=max_parts - len(items)
+        )
+    except ValueError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, message=f"More than {max_parts} form fields.")
+    for name, value in fields:
+        if len(value) > max_field_size:
+            raise HTTPException(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        items.append((name, value))
+
+
+class MultipartParser:
+    """
+    Incremental `multipart/form-data` parser.
+
+    Chunks are parsed as they arrive. Only the unparsed tail of the body is buffered: at most a part's
+    headers or the bytes that could be the start of the next boundary. Field values are kept in memory up
+    to `max_field_size` bytes, files are written to `UploadFile`s, so memory use does not grow with the
+    size of the upload.
+    """
+
+    def __init__(
+        self,
+        boundary: bytes,
+        *,
+        max_parts: int = DEFAULT_MAX_PARTS,
+        max_field_size: int = DEFAULT_MAX_FIELD_SIZE,
+        max_size: Optional[int] = None,
+        spool_max_size: int = DEFAULT_SPOOL_MAX_SIZE,
+    ) -> None:
+        if not boundary or len(boundary) > 200:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, message="Invalid multipart boundary.")
+        # Every boundary, the first one included once a CRLF is put in front of the body, is CRLF--boundary.
+        self.delimiter = b"\r\n--" + boundary
+        self.max_parts = max_parts
+        self.max_field_size = max_field_size
+        self.max_size = max_size
+        self.spool_max_size = spool_max_size
+        self.items: List[Tuple[str, Union[str, UploadFile]]] = []
+        self._buffer = bytearray(b"\r\n")
+        self._state = "preamble"
+        self._received = 0
+        self._name = ""
+        self._field: Optional[bytearray] = None
+        self._file: Optional[UploadFile] = None
+
+    async def parse(self, stream: AsyncIterable[bytes]) -> FormData:
+        try:
+            async for chunk in stream:
+                await self.feed(chunk)
+            if self._state != "end":
+                raise HTTPException(status.HTTP_400_BAD_REQUEST, message="Incomplete multipart body.")
+        except BaseException:
+            await FormData(self.items).close()
+            if self._file is not None:
+                await self._file.close()
+            raise
+        return FormData(self.items)
+
+    async def feed(self, chunk: bytes) -> None:
+        self._received += len(chunk)
+        if self.max_size is not None and self._received > self.max_size:
+            raise HTTPException(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        buffer = self._buffer
+        buffer += chunk
+        delimiter = self.delimiter
+        while True:
+            state = self._state
+            if state == "preamble":
+                index = buffer.find(delimiter)
+                if index == -1:
+                    del buffer[: max(0, len(buffer) - len(delimiter) + 1)]
+                    return
+                del buffer[: index + len(delimiter)]
+                self._state = "delimiter"
+            elif state == "delimiter":
+                if len(buffer) < 2:
+                    return
+                if buffer.startswith(b"--"):
+                    self._state = "end"
+                elif buffer.startswith(b"\r\n"):
+                    self._state = "headers"
+                else:
+                    raise HTTPException(status.HTTP_400_BAD_REQUEST, message="Invalid multipart boundary.")
+                del buffer[:2]
+            elif state == "headers":
+                index = buffer.find(b"\r\n\r\n")
+                if index == -1:
+                    if len(buffer) > MAX_PART_HEADER_SIZE:
+                        raise HTTPException(status.HTTP_400_BAD_REQUEST, message="Multipart headers too large.")
+                    return
+                self._start_part(bytes(buffer[:index]))
+                del buffer[: index + 4]
+                self._state = "body"
+            elif state == "body":
+                index = buffer.find(delimiter)
+                if index == -1:
+                    # Keep what may be the beginning of the delimiter.
+                    safe = len(buffer) - len(delimiter) + 1
+                    if safe > 0:
+                        await self._write(bytes(buffer[:safe]))
+                        del buffer[:safe]
+                    return
+                await self._write(bytes(buffer[:index]))
+                del buffer[: index + len(delimiter)]
+                await self._end_part()
+                self._state = "delimiter"
+            else:
+                # Epilogue, ignored.
+                buffer.clear()
+                return
+
+    def _start_part(self, raw_headers: bytes) -> None:
+        if len(self.items) >= self.max_parts:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, message=f"More than {self.max_parts} form parts.")
+        headers: Dict[str, str] = {}
+        for line in raw_headers.decode("utf-8", "replace").split("\r\n"):
+            name, separator, value = line.partition(":")
+            if separator:
+                headers[name.strip().lower()] = value.strip()
+        disposition, options = parse_options_header(headers.get("content-disposition", ""))
+        if disposition != "form-data" or "name" not in options:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, message="Invalid multipart part headers.")
+        self._name = options["name"]
+        filename = options.get("filename")
+        if "filename*" in options:
+            _, _, encoded = options["filename*"].partition("''")
+            filename = unquote(encoded)
+        if filename is None:
+            self._field = bytearray()
+        else:
+            self._file = UploadFile(
+                filename,
+                headers.get("content-type", "application/octet-stream"),
+                headers,
+                self.spool_max_size,
+            )
+
+    async def _write(self, data: bytes) -> None:
+        if not data:
+            return
+        if self._file is not None:
+            await self._file.write(data)
+        elif self._field is not None:
+            self._field += data
+            if len(self._field) > self.max_field_size:
+                raise HTTPException(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    async def _end_part(self) -> None:
+        if self._file is not None:
+            await self._file.seek(0)
+            self.items.append((self._name, self._file))
+            self._file = None
+        elif self._field is not None:
+            self.items.append((self._name, self._field.decode("utf-8", "replace")))
+            self._field = None
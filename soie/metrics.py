@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Dict, List, Sequence
+
+from .requests import Request
+from .responses import PlainTextResponse, Response
+
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+PHASES = ("routing", "handler", "send")
+
+#: Scope key under which the metered dispatch leaves the matched route and the seconds spent finding it.
+ROUTE_SCOPE_KEY = "soie.route"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Observations are counted in the first bucket they fit, the counts are only
+    made cumulative when rendered.
+    """
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class RouteMetrics:
+    __slots__ = ("statuses", "phases")
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        # Indexed by the status code's first digit.
+        self.statuses = [0] * 6
+        self.phases = [Histogram(buckets) for _ in PHASES]
+
+    @property
+    def requests(self) -> int:
+        return sum(self.statuses)
+
+
+class Metrics:
+    """
+    Per-route request counts by status class and latency histograms, split into routing, handler (with the
+    request -> response middlewares) and response sending time.
+
+    Routes are labelled by their path template, requests that matched no route by an empty label. The
+    counters are plain attributes updated from the event loop thread, nothing is locked.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, *, namespace: str = "soie") -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.namespace = namespace
+        self.routes: Dict[str, RouteMetrics] = {}
+
+    def observe(self, route: str, status_code: int, routing: float, handler: float, send: float) -> None:
+        metrics = self.routes.get(route)
+        if metrics is None:
+            metrics = self.routes[route] = RouteMetrics(self.buckets)
+        metrics.statuses[min(status_code // 100, 5)] += 1
+        routing_histogram, handler_histogram, send_histogram = metrics.phases
+        routing_histogram.observe(routing)
+        handler_histogram.observe(handler)
+        send_histogram.observe(send)
+
+    def render(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+        """
+        requests_name, duration_name = f"{self.namespace}_requests_total", f"{self.namespace}_request_duration_seconds"
+        requests: List[str] = [
+            f"# HELP {requests_name} Requests handled, by route template and status class.",
+            f"# TYPE {requests_name} counter",
+        ]
+        durations: List[str] = [
+            f"# HELP {duration_name} Request latency, by route template and phase.",
+            f"# TYPE {duration_name} histogram",
+        ]
+        bounds = [*(format(bucket, "g") for bucket in self.buckets), "+Inf"]
+        for route, metrics in self.routes.items():
+            label = f'route="{escape_label(route)}"'
+            for status_class, count in enumerate(metrics.statuses):
+                if count:
+                    requests.append(f'{requests_name}{{{label},status="{status_class}xx"}} {count}')
+            for phase, histogram in zip(PHASES, metrics.phases):
+                labels = f'{label},phase="{phase}"'
+                cumulative = 0
+                for bound, count in zip(bounds, histogram.counts):
+                    cumulative += count
+                    durations.append(f'{duration_name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                durations.append(f"{duration_name}_sum{{{labels}}} {histogram.sum!r}")
+                durations.append(f"{duration_name}_count{{{labels}}} {cumulative}")
+        return "\n".join(requests + durations) + "\n"
+
+    async def view(self, request: Request) -> Response:
+        return PlainTextResponse(self.render(), media_type="text/plain; version=0.0.4")
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
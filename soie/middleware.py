@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable
+
+from typing_extensions import TypeAlias
+
+from .requests import Request
+from .responses import PrebuiltResponse, Response
+from .types import ASGIApp
+
+CallNext: TypeAlias = Callable[[Request], Awaitable[Response]]
+HTTPMiddleware: TypeAlias = Callable[[Request, CallNext], Awaitable[Response]]
+
+
+class Middleware:
+    """
+    A pure ASGI middleware, built as `factory(app, **options)` when the application starts.
+    """
+
+    __slots__ = ("factory", "options")
+
+    def __init__(self, factory: Callable[..., ASGIApp], **options: Any) -> None:
+        self.factory = factory
+        self.options = options
+
+    def __repr__(self) -> str:
+        options = "".join(f", {key}={value!r}" for key, value in self.options.items())
+        return f"{self.__class__.__name__}({getattr(self.factory, '__name__', self.factory)}{options})"
+
+
+def wrap_http_middleware(middleware: HTTPMiddleware, call_next: CallNext) -> CallNext:
+    async def next_response(request: Request) -> Response:
+        response = await call_next(request)
+        # Shared responses are copied, so the middleware may change them for this request only.
+        if isinstance(response, PrebuiltResponse) and response.shared:
+            return response.copy()
+        return response
+
+    async def handle(request: Request) -> Response:
+        return await middleware(request, next_response)
+
+    return handle
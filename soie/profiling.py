@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import cProfile
+import hmac
+import itertools
+import logging
+import os
+import re
+import time
+from collections import deque
+from typing import Deque, List, Optional
+
+from .concurrency import run_in_threadpool
+from .middleware import CallNext
+from .requests import Request
+from .responses import Response
+
+logger = logging.getLogger(__name__)
+
+
+class Profiler:
+    """
+    Request -> response middleware profiling one in `sample_rate` requests, and requests carrying
+    `trigger_header` set to `trigger_token`, with `cProfile`.
+
+        profiler = Profiler("/var/tmp/soie-profiles", sample_rate=1000, trigger_header="X-Profile", trigger_token=...)
+        app = Soie(middleware=[..., profiler])
+
+    Put it last to profile only the handler. Every profile is written as a `.pstats` file (load it with
+    `pstats.Stats` or snakeviz) in `directory`, which keeps the `max_files` newest ones. `cProfile` sees
+    the whole thread, so a profile also covers whatever other requests run while the profiled one awaits;
+    a request arriving while one is being profiled is not profiled.
+
+    Not adding it costs nothing, there is no per-request check when profiling is off. A profile that
+    cannot be written is logged, the response is sent all the same.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        *,
+        sample_rate: int = 0,
+        trigger_header: Optional[str] = None,
+        trigger_token: Optional[str] = None,
+        max_files: int = 20,
+    ) -> None:
+        if sample_rate < 0:
+            raise ValueError("sample_rate must not be negative.")
+        if (trigger_header is None) != (trigger_token is None):
+            raise ValueError("trigger_header and trigger_token must be set together.")
+        if max_files <= 0:
+            raise ValueError("max_files must be a positive integer.")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.trigger_header = trigger_header
+        self.trigger_token = None if trigger_token is None else trigger_token.encode("latin-1")
+        self.max_files = max_files
+        self._requests = itertools.count(1)
+        self._sequence = itertools.count(1)
+        self._profiling = False
+        paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".pstats")]
+        self.files: Deque[str] = deque(sorted(paths, key=os.path.getmtime))
+
+    def should_profile(self, request: Request) -> bool:
+        if self.sample_rate and next(self._requests) % self.sample_rate == 0:
+            return True
+        if self.trigger_header is not None:
+            token = request.headers.get(self.trigger_header)
+            return token is not None and hmac.compare_digest(token.encode("latin-1"), self.trigger_token)
+        return False
+
+    async def __call__(self, request: Request, call_next: CallNext) -> Response:
+        if self._profiling or not self.should_profile(request):
+            return await call_next(request)
+
+        profile = cProfile.Profile()
+        self._profiling = True
+        profile.enable()
+        try:
+            return await call_next(request)
+        finally:
+            profile.disable()
+            self._profiling = False
+            await self.save(profile, request)
+
+    async def save(self, profile: cProfile.Profile, request: Request) -> Optional[str]:
+        """
+        Write `profile` to a new file in the directory, then delete the oldest files beyond `max_files`.
+        Return its path, or None if it could not be written.
+
+        Only the file I/O runs in the thread pool, `files` is updated on the event loop.
+        """
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", request["path"]).strip("_")[:64]
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{next(self._sequence):06d}-{request.method}-{slug}.pstats"
+        path = os.path.join(self.directory, name)
+        try:
+            await run_in_threadpool(profile.dump_stats, path)
+        except Exception:
+            logger.exception("Could not save the profile of %s %s to %s.", request.method, request["path"], path)
+            return None
+        self.files.append(path)
+        stale = [self.files.popleft() for _ in range(len(self.files) - self.max_files)]
+        if stale:
+            try:
+                await run_in_threadpool(remove_files, stale)
+            except OSError:
+                logger.exception("Could not delete old profiles.")
+        return path
+
+
+def remove_files(paths: List[str]) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
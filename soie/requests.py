@@ -1,26 +1,82 @@
 from __future__ import annotations
 
-from functools import cache
-from typing import Any
+import asyncio
+import json
+import re
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 from urllib.parse import parse_qsl
 
+from . import status
+from .exceptions import ClientDisconnect, HTTPException
+from .forms import (
+    DEFAULT_MAX_FIELD_SIZE,
+    DEFAULT_MAX_PARTS,
+    DEFAULT_MAX_URLENCODED_SIZE,
+    DEFAULT_SPOOL_MAX_SIZE,
+    FormData,
+    MultipartParser,
+    parse_options_header,
+    parse_urlencoded,
+)
+from .responses import BODY_READ_SCOPE_KEY
 from .types import Receive, Scope
 
 
 class Request:
     """
     Request wrapped ASGI's request information.
+
+    The body can be read once with `stream()`, or buffered with `body()` / `json()`, which cache their
+    result. `max_body_size` is set by the application from the route or app setting, reading more bytes
+    than that raises a 413 `HTTPException`.
+
+    Derived values are cached on the instance itself, so nothing outlives the request.
     """
 
+    __slots__ = (
+        "_scope",
+        "_receive",
+        "_body",
+        "_json",
+        "_stream_consumed",
+        "_headers",
+        "_query_params",
+        "_cookies",
+        "_form",
+        "max_body_size",
+    )
+
     def __init__(self, scope: Scope, receive: Receive) -> None:
         self._scope = scope
         self._receive = receive
+        self._body: Optional[bytes] = None
+        self._json: Any = _UNSET
+        self._stream_consumed = False
+        self._headers: Optional[RequestHeaders] = None
+        self._query_params: Optional[QueryParams] = None
+        self._cookies: Optional[Dict[str, str]] = None
+        self._form: Optional[FormData] = None
+        self.max_body_size: Optional[int] = None
 
     def __getitem__(self, key: str) -> Any:
         return self._scope[key]
 
     @property
-    @cache
+    def scope(self) -> Scope:
+        return self._scope
+
+    @property
     def method(self) -> str:
         return self._scope["method"]
 
@@ -33,17 +89,266 @@ class Request:
         self._scope["path_params"] = params
 
     @property
-    @cache
+    def headers(self) -> RequestHeaders:
+        if self._headers is None:
+            self._headers = RequestHeaders(self._scope.get("headers", ()))
+        return self._headers
+
+    @property
     def query_params(self) -> QueryParams:
-        return QueryParams(self["query_string"])
+        if self._query_params is None:
+            self._query_params = QueryParams(self._scope.get("query_string", b""))
+        return self._query_params
+
+    @property
+    def cookies(self) -> Dict[str, str]:
+        if self._cookies is None:
+            self._cookies = parse_cookie_header("; ".join(self.headers.getlist("cookie")))
+        return self._cookies
+
+    def stream(self) -> AsyncIterator[bytes]:
+        """
+        Iterate over the body as it is received. From this call until the body is read to the end, nothing
+        else calls `receive`: a `StreamingResponse` sending the stream back waits for it before listening
+        for the client disconnecting.
+        """
+        if self._body is not None:
+            return _iterate_body(self._body)
+        if self._stream_consumed:
+            raise RuntimeError("Request body has already been consumed.")
+        self._stream_consumed = True
+        body_read = self._scope[BODY_READ_SCOPE_KEY] = asyncio.Event()
+        return self._receive_body(body_read)
+
+    async def _receive_body(self, body_read: asyncio.Event) -> AsyncIterator[bytes]:
+        try:
+            max_body_size = self.max_body_size
+            if max_body_size is not None:
+                content_length = self.headers.get("content-length", "")
+                if content_length.isdigit() and int(content_length) > max_body_size:
+                    raise HTTPException(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            received = 0
+            while True:
+                message = await self._receive()
+                if message["type"] == "http.disconnect":
+                    raise ClientDisconnect()
+                chunk = message.get("body", b"")
+                if chunk:
+                    received += len(chunk)
+                    if max_body_size is not None and received > max_body_size:
+                        raise HTTPException(status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+                    yield chunk
+                if not message.get("more_body", False):
+                    break
+        finally:
+            body_read.set()
+
+    async def body(self) -> bytes:
+        if self._body is None:
+            self._body = b"".join([chunk async for chunk in self.stream()])
+        return self._body
+
+    async def json(self) -> Any:
+        if self._json is _UNSET:
+            self._json = json.loads(await self.body())
+        return self._json
+
+    async def form(
+        self,
+        *,
+        max_parts: int = DEFAULT_MAX_PARTS,
+        max_field_size: int = DEFAULT_MAX_FIELD_SIZE,
+        max_size: Optional[int] = None,
+        spool_max_size: int = DEFAULT_SPOOL_MAX_SIZE,
+    ) -> FormData:
+        """
+        Parse an `application/x-www-form-urlencoded` or `multipart/form-data` body, other content types give
+        an empty form. Multipart bodies are parsed while they are received, with uploaded files kept in
+        memory up to `spool_max_size` bytes and on disk beyond.
+
+        More than `max_parts` fields is a 400, a field value over `max_field_size` or a body over `max_size`
+        bytes a 413. Urlencoded bodies are held in memory, so without `max_size` they are limited to
+        `DEFAULT_MAX_URLENCODED_SIZE` bytes, multipart ones then only by the request's `max_body_size`. The
+        result is cached, the limits of the first call apply.
+        """
+        if self._form is None:
+            content_type, options = parse_options_header(self.headers.get("content-type", ""))
+            if content_type == "multipart/form-data":
+                parser = MultipartParser(
+                    options.get("boundary", "").encode("latin-1"),
+                    max_parts=max_parts,
+                    max_field_size=max_field_size,
+                    max_size=max_size,
+                    spool_max_size=spool_max_size,
+                )
+                self._form = await parser.parse(self.stream())
+            elif content_type == "application/x-www-form-urlencoded":
+                self._form = await parse_urlencoded(
+                    self.stream(),
+                    max_parts=max_parts,
+                    max_field_size=max_field_size,
+                    max_size=DEFAULT_MAX_URLENCODED_SIZE if max_size is None else max_size,
+                )
+            else:
+                self._form = FormData([])
+        return self._form
+
+
+_UNSET: Any = object()
+
+
+async def _iterate_body(body: bytes) -> AsyncIterator[bytes]:
+    yield body
+
+
+def parse_cookie_header(value: str) -> Dict[str, str]:
+    """
+    Parse a `Cookie` header leniently, like browsers send it rather than by the letter of RFC 6265. When a
+    name repeats, the first (most specific path) value wins.
+    """
+    cookies: Dict[str, str] = {}
+    for item in value.split(";"):
+        name, separator, cookie_value = item.partition("=")
+        if not separator:
+            # A bare value, treated as a cookie with an empty name like browsers do.
+            name, cookie_value = "", name
+        name, cookie_value = name.strip(), cookie_value.strip()
+        if not name and not cookie_value:
+            continue
+        if len(cookie_value) > 1 and cookie_value[0] == cookie_value[-1] == '"':
+            cookie_value = _COOKIE_ESCAPE_REGEX.sub(_unescape_cookie, cookie_value[1:-1])
+        cookies.setdefault(name, cookie_value)
+    return cookies
+
+
+_COOKIE_ESCAPE_REGEX = re.compile(r"\\(?:([0-3][0-7][0-7])|(.))")
+
+
+def _unescape_cookie(matched: "re.Match[str]") -> str:
+    octal, char = matched.groups()
+    return chr(int(octal, 8)) if octal else char
+
+
+class RequestHeaders(Mapping[str, str]):
+    """
+    Read-only, case-insensitive view of ASGI's raw header list.
 
+    Nothing is done until the first lookup, which indexes the raw names once; values are decoded only
+    when they are read. Repeated headers are joined with ", ", use `getlist` to get them one by one.
+    """
+
+    __slots__ = ("_raw", "_index")
+
+    def __init__(self, raw: Iterable[Tuple[bytes, bytes]]) -> None:
+        self._raw = raw
+        self._index: Optional[Dict[bytes, bytes]] = None
+
+    @property
+    def raw(self) -> List[Tuple[bytes, bytes]]:
+        return list(self._raw)
+
+    def _get_index(self) -> Dict[bytes, bytes]:
+        index = self._index
+        if index is None:
+            index = self._index = {}
+            for key, value in self._raw:
+                key = key.lower()
+                if key in index:
+                    index[key] += b", " + value
+                else:
+                    index[key] = value
+        return index
+
+    def getlist(self, key: str) -> List[str]:
+        name = key.lower().encode("latin-1")
+        return [value.decode("latin-1") for raw_key, value in self._raw if raw_key.lower() == name]
+
+    def __getitem__(self, key: str) -> str:
+        return self._get_index()[key.lower().encode("latin-1")].decode("latin-1")
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and key.lower().encode("latin-1") in self._get_index()
+
+    def __iter__(self) -> Iterator[str]:
+        return (key.decode("latin-1") for key in self._get_index())
+
+    def __len__(self) -> int:
+        return len(self._get_index())
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.raw!r})"
+
+
+class QueryParams(Mapping[str, str]):
+    """
+    Immutable multi-dict over a query string.
+
+    The query string is decoded and parsed on the first read only. `params[key]` and `get` return the last
+    value of a repeated key, `getlist` returns all of them.
+    """
+
+    __slots__ = ("_query_string", "_lists")
+
+    def __init__(self, query_string: Union[bytes, str] = b"") -> None:
+        self._query_string = query_string
+        self._lists: Optional[Dict[str, List[str]]] = None
+
+    def _get_lists(self) -> Dict[str, List[str]]:
+        lists = self._lists
+        if lists is None:
+            query_string = self._query_string
+            if isinstance(query_string, bytes):
+                query_string = query_string.decode("utf-8", "replace")
+            lists = self._lists = {}
+            for key, value in parse_qsl(query_string, keep_blank_values=True):
+                if key in lists:
+                    lists[key].append(value)
+                else:
+                    lists[key] = [value]
+        return lists
+
+    def getlist(self, key: str) -> List[str]:
+        return list(self._get_lists().get(key, ()))
+
+    def multi_items(self) -> List[Tuple[str, str]]:
+        return [(key, value) for key, values in self._get_lists().items() for value in values]
 
-class QueryParams:
-    def __init__(self, query_string: bytes) -> None:
-        print(query_string)
-        self._dict = {
-            key.decode("utf-8"): value.decode("utf-8") for key, value in parse_qsl(query_string, keep_blank_values=True)
-        }
+    def get_int(self, key: str, default: Optional[int] = None) -> Optional[int]:
+        """
+        Return the value as an int, or `default` if it is missing or not an integer.
+        """
+        value = self.get(key)
+        if value is None:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            return default
+
+    def get_bool(self, key: str, default: Optional[bool] = None) -> Optional[bool]:
+        """
+        Return the value as a bool ("1", "true", "yes", "on" or "0", "false", "no", "off", case-insensitive),
+        or `default` if it is missing or not one of those.
+        """
+        value = self.get(key)
+        if value is None:
+            return default
+        return _BOOLEANS.get(value.lower(), default)
 
     def __getitem__(self, key: str) -> str:
-        return self._dict[key]
+        return self._get_lists()[key][-1]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._get_lists()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._get_lists())
+
+    def __len__(self) -> int:
+        return len(self._get_lists())
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.multi_items()!r})"
+
+
+_BOOLEANS = {"1": True, "true": True, "yes": True, "on": True, "0": False, "false": False, "no": False, "off": False}
@@ -1,15 +1,29 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import copy
+import hashlib
+import mimetypes
+import os
+import re
+import secrets
+import stat
+import string
+import time
+import zlib
 from abc import ABC, abstractmethod
-from http.cookies import SimpleCookie
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+from types import MappingProxyType
 from typing import (
     Any,
     AnyStr,
+    AsyncIterable,
     Dict,
     Generic,
     Iterable,
     Iterator,
+    List,
     Mapping,
     Optional,
     Tuple,
@@ -22,13 +36,27 @@ from typing_extensions import Literal
 from soie.types import Receive, Scope, Send
 
 from . import status
+from .compression import COMPRESSION_SCOPE_KEY, compress, compressible, encoded_headers
+from .concurrency import iterate_in_threadpool, run_in_threadpool
+from .encoders import JSONEncoder, default_json_encoder, get_json_encoder
 
 _C = TypeVar("_C")
 
+#: Scope key of the `asyncio.Event` set once `Request.stream()` is done reading the request body.
+BODY_READ_SCOPE_KEY = "soie.body_read"
+
 
 class Response(ABC, Generic[_C]):
+    """
+    A response with an `etag` or `last-modified` header (see `set_etag`) answers GET and HEAD requests whose
+    `If-None-Match` / `If-Modified-Since` match it with an empty 304.
+    """
+
     media_type = "text/plain"
     charset = "utf-8"
+    compute_etag: Optional[Literal["strong", "weak"]] = None
+    # Created by the first `set_cookie`, most responses never set one.
+    _cookies: Optional[Dict[str, str]] = None
 
     def __init__(
         self,
@@ -41,7 +69,6 @@ class Response(ABC, Generic[_C]):
         self.content = content
         self.status_code = status_code
         self.headers = MutableHeaders(headers)
-        self.cookies = SimpleCookie()
         if media_type is not None:
             self.media_type = media_type
         if charset is not None:
@@ -57,49 +84,110 @@ class Response(ABC, Generic[_C]):
         domain: str = None,
         secure: bool = False,
         httponly: bool = False,
-        samesite: Literal["strict", "lax", "none"] = "lax",
+        samesite: Optional[Literal["strict", "lax", "none"]] = "lax",
+        attributes: Optional[str] = None,
     ) -> None:
-        cookies = self.cookies
-        cookies[key] = value
-        if max_age is not None:
-            cookies[key]["max_age"] = max_age
+        """
+        Add a `Set-Cookie` header. `expires` is in seconds from now. `attributes` is a suffix made by
+        `cookie_attributes`, used instead of `max_age`, `path`, `domain`, `secure`, `httponly` and
+        `samesite`. A `key` that is not an RFC 6265 token raises ValueError.
+        """
+        if not _COOKIE_NAME_REGEX.fullmatch(key):
+            raise ValueError(f"Invalid cookie name {key!r}.")
+        if attributes is None:
+            attributes = cookie_attributes(max_age, path, domain, secure, httponly, samesite)
+        cookie = f"{key}={quote_cookie_value(value)}{attributes}"
         if expires is not None:
-            cookies[key]["expires"] = expires
-        if path is not None:
-            cookies[key]["path"] = path
-        if domain is not None:
-            cookies[key]["domain"] = domain
-        if secure:
-            cookies[key]["secure"] = True
-        if httponly:
-            cookies[key]["httponly"] = True
-        if samesite is not None:
-            cookies[key]["samesite"] = samesite
+            cookie += f"; Expires={formatdate(time.time() + expires, usegmt=True)}"
+        if self._cookies is None:
+            self._cookies = {}
+        self._cookies[key] = cookie
+
+    @property
+    def cookies(self) -> Mapping[str, str]:
+        """
+        The `Set-Cookie` values set on this response, by cookie name.
+        """
+        return self._cookies or _NO_COOKIES
 
     def delete_cookie(self, key: str, path: str = "/", domain: str = None) -> None:
         self.set_cookie(key, expires=0, max_age=0, path=path, domain=domain)
 
+    def set_etag(self, token: Optional[str] = None, *, weak: bool = False) -> None:
+        """
+        Send `token`, e.g. a version number, as the ETag. Without `token` it is computed from the serialized
+        body: a hash, or with `weak=True` the cheaper length and CRC32.
+        """
+        if token is None:
+            self.compute_etag = "weak" if weak else "strong"
+        else:
+            self.headers["etag"] = make_etag(token, weak)
+
+    def is_not_modified(self, scope: Scope, headers: Optional[Headers] = None) -> bool:
+        if headers is None:
+            headers = self.headers
+        return (
+            self.status_code == status.HTTP_200_OK
+            and scope.get("method") in ("GET", "HEAD")
+            and is_not_modified(scope.get("headers", ()), headers.get("etag"), headers.get("last-modified"))
+        )
+
     @abstractmethod
     async def serialize_content(self, content: _C) -> bytes:
         ...
 
-    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
-        body = await self.serialize_content(self.content)
-        if "content-length" not in self.headers:
-            content_length = str(len(body))
-            self.headers["content-length"] = content_length
+    def raw_headers(self, headers: Optional[MutableHeaders] = None) -> List[Tuple[bytes, bytes]]:
+        if headers is None:
+            headers = self.headers
         content_type = self.media_type
-        if content_type and "cotent-type" not in self.headers:
+        if content_type and "content-type" not in headers:
             if content_type.startswith("text/"):
                 content_type += "; charset=" + self.charset
+            headers["content-type"] = content_type
+        raw = [(key.encode("latin-1"), value.encode("latin-1")) for key, value in headers.items()]
+        if self._cookies:
+            raw.extend((b"set-cookie", cookie.encode("latin-1")) for cookie in self._cookies.values())
+        return raw
+
+    async def freeze(self, scope: Optional[Scope] = None) -> PrebuiltResponse:
+        """
+        Serialize this response once into a `PrebuiltResponse` that can be sent any number of times.
+
+        Pass the request's `scope` to serialize with the application's settings, such as its JSON backend.
+        """
+        response = PrebuiltResponse(
+            await self.serialize_content(self.content),
+            self.status_code,
+            self.headers,
+            self.media_type,
+            self.charset,
+        )
+        if self._cookies or self.compute_etag is not None:
+            response._cookies = None if self._cookies is None else dict(self._cookies)
+            response.compute_etag = self.compute_etag
+            response.prebuild()
+        return response
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        headers = self.headers
+        body = None
+        # The body is only needed up front when the ETag is computed from it.
+        if self.compute_etag is not None and "etag" not in headers:
+            body = await self.serialize_content(self.content)
+            headers["etag"] = body_etag(body, self.compute_etag == "weak")
+        if ("etag" in headers or "last-modified" in headers) and self.is_not_modified(scope):
+            await send_not_modified(send, self.raw_headers())
+            return
+        if body is None:
+            body = await self.serialize_content(self.content)
+        if "content-length" not in headers:
+            content_length = str(len(body))
+            headers["content-length"] = content_length
         await send(
             {
                 "type": "http.response.start",
                 "status": self.status_code,
-                "headers": [
-                    *((key.encode("latin-1"), value.encode("latin-1")) for key, value in self.headers.items()),
-                    *((b"set-cookie", c.output(header="").encode("latin-1")) for c in self.cookies.values()),
-                ],
+                "headers": self.raw_headers(),
             }
         )
         await send(
@@ -117,17 +205,554 @@ class PlainTextResponse(Response[AnyStr]):
         return content if isinstance(content, bytes) else content.encode(self.charset)
 
 
+class PrebuiltResponse(Response[bytes]):
+    """
+    A response whose `http.response.start` headers and body bytes are rendered when it is created.
+
+    Sending it does no serialization work, so one instance can be shared by every request, e.g. as a
+    module level constant. A shared instance cannot be changed: `headers` is read-only, and setting
+    `status_code` or `content`, `set_cookie` and `set_etag` raise RuntimeError. `copy()` gives a per-request
+    copy that can be changed like any response and is only rendered again if it was; request -> response
+    middleware receive such copies from `call_next`.
+
+    Under `CompressionMiddleware` the compressed body is cached per encoding and level, so a shared
+    instance is compressed once, not on every request.
+    """
+
+    _shared = False
+    # The shared instance a copy was made from, until the copy is changed and rendered again.
+    _source: Optional[PrebuiltResponse] = None
+
+    def __init__(
+        self,
+        content: bytes = b"",
+        status_code: int = status.HTTP_200_OK,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        charset: Optional[str] = None,
+    ) -> None:
+        super().__init__(content, status_code, headers, media_type, charset)
+        self._shared = True
+        self.prebuild()
+
+    @property
+    def shared(self) -> bool:
+        return self._shared
+
+    @property  # type: ignore[override]
+    def status_code(self) -> int:
+        return self._status_code
+
+    @status_code.setter
+    def status_code(self, value: int) -> None:
+        self._check_mutable("status_code")
+        self._status_code = value
+
+    @property  # type: ignore[override]
+    def content(self) -> bytes:
+        return self._content
+
+    @content.setter
+    def content(self, value: bytes) -> None:
+        self._check_mutable("content")
+        self._content = value
+        if self._source is not None:
+            # Drop what was derived from the previous body.
+            headers = self.headers
+            if "content-length" in headers:
+                del headers["content-length"]
+            if self.compute_etag is not None and "etag" in headers:
+                del headers["etag"]
+
+    def _check_mutable(self, name: str) -> None:
+        if self._shared:
+            raise RuntimeError(
+                f"Cannot change {name} of a shared PrebuiltResponse, it is sent to other requests too. "
+                "Change a copy() of it instead."
+            )
+
+    def copy(self) -> PrebuiltResponse:
+        """
+        Return a copy for one request. It shares the rendered headers and body, including the compressed
+        ones, until it is changed.
+        """
+        response = copy.copy(self)
+        response._shared = False
+        response._source = self
+        response.headers = MutableHeaders(self.headers)
+        if self._cookies is not None:
+            response._cookies = dict(self._cookies)
+        return response
+
+    def prebuild(self) -> None:
+        headers = MutableHeaders(self.headers)
+        headers.setdefault("content-length", str(len(self.content)))
+        if self.compute_etag is not None:
+            headers.setdefault("etag", body_etag(self.content, self.compute_etag == "weak"))
+        self.conditional = "etag" in headers or "last-modified" in headers
+        self.raw = self.raw_headers(headers)
+        self.headers = Headers(headers) if self._shared else headers  # type: ignore[assignment]
+        self._compressed: Dict[Tuple[str, int], Tuple[List[Tuple[bytes, bytes]], bytes]] = {}
+
+    def _render_changes(self) -> None:
+        source = self._source
+        if source is None:
+            return
+        if (
+            self._status_code != source._status_code
+            or self._content is not source._content
+            or self.headers._dict != source.headers._dict
+            or self._cookies != source._cookies
+            or self.compute_etag != source.compute_etag
+            or self.media_type != source.media_type
+            or self.charset != source.charset
+        ):
+            self._source = None
+            self.prebuild()
+
+    def set_cookie(self, key: str, *args: Any, **kwargs: Any) -> None:
+        self._check_mutable("cookies")
+        super().set_cookie(key, *args, **kwargs)
+
+    def set_etag(self, token: Optional[str] = None, *, weak: bool = False) -> None:
+        self._check_mutable("the ETag")
+        super().set_etag(token, weak=weak)
+
+    async def serialize_content(self, content: bytes) -> bytes:
+        return content
+
+    async def freeze(self, scope: Optional[Scope] = None) -> PrebuiltResponse:
+        if self._shared:
+            return self
+        return await super().freeze(scope)
+
+    def compressed(self, encoding: str, level: int, minimum_size: int) -> Tuple[List[Tuple[bytes, bytes]], bytes]:
+        """
+        Return the raw headers and body compressed with `encoding`, or as they are if the response is
+        not worth compressing.
+        """
+        if len(self.content) < minimum_size or not compressible(self.status_code, self.raw):
+            return self.raw, self.content
+        key = (encoding, level)
+        cached = self._compressed.get(key)
+        if cached is None:
+            content = compress(self.content, encoding, level)
+            cached = self._compressed[key] = (encoded_headers(self.raw, encoding, len(content)), content)
+        return cached
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self._source is not None:
+            self._render_changes()
+        compression = scope.get(COMPRESSION_SCOPE_KEY)
+        if compression is None:
+            raw, content = self.raw, self.content
+        else:
+            raw, content = self.compressed(*compression)
+        if self.conditional and self.is_not_modified(scope):
+            await send_not_modified(send, raw)
+            return
+        # Copy the header list, the receiver may extend it.
+        await send({"type": "http.response.start", "status": self.status_code, "headers": raw.copy()})
+        await send({"type": "http.response.body", "body": content})
+
+
 class JSONResponse(Response[Any]):
     """
     Note: Python now does not have a elegant *jsonable* type, hence the content's type is Any.
+
+    The content is encoded by `json_encoder`, by default the application's JSON backend (see
+    `soie.encoders`).
     """
 
     media_type = "application/json"
 
+    def __init__(
+        self,
+        content: Any = None,
+        status_code: int = status.HTTP_200_OK,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        charset: Optional[str] = None,
+        json_encoder: Union[str, JSONEncoder, None] = None,
+    ) -> None:
+        super().__init__(content, status_code, headers, media_type, charset)
+        self.json_encoder = None if json_encoder is None else get_json_encoder(json_encoder)
+
     async def serialize_content(self, content: Any) -> bytes:
-        return json.dumps(
-            content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"), default=None
-        ).encode(self.charset)
+        return (self.json_encoder or default_json_encoder)(content)
+
+    async def freeze(self, scope: Optional[Scope] = None) -> PrebuiltResponse:
+        if self.json_encoder is None and scope is not None:
+            self.json_encoder = getattr(scope.get("app"), "json_encoder", None)
+        return await super().freeze(scope)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.json_encoder is None:
+            self.json_encoder = getattr(scope.get("app"), "json_encoder", None)
+        await super().__call__(scope, receive, send)
+
+
+Chunk = Union[str, bytes]
+ContentStream = Union[Iterable[Chunk], AsyncIterable[Chunk]]
+
+
+class StreamingResponse(Response[ContentStream]):
+    """
+    Send the content chunk by chunk as it is produced.
+
+    Sync iterables are iterated in the thread pool. No `content-length` is sent unless it is set in
+    `headers`. Producing stops as soon as the client disconnects; while the request body is still being
+    read, e.g. when streaming `request.stream()` back, the disconnect is noticed by the body reader.
+    """
+
+    async def serialize_content(self, content: ContentStream) -> bytes:
+        return b"".join([chunk async for chunk in self.iterate_content(content)])
+
+    async def iterate_content(self, content: ContentStream) -> AsyncIterable[bytes]:
+        if isinstance(content, AsyncIterable):
+            iterator = content
+        else:
+            iterator = iterate_in_threadpool(content)
+        async for chunk in iterator:
+            yield chunk if isinstance(chunk, bytes) else chunk.encode(self.charset)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        stream = asyncio.ensure_future(self.stream_content(send))
+        disconnected = asyncio.ensure_future(wait_for_disconnect(receive, scope.get(BODY_READ_SCOPE_KEY)))
+        try:
+            await asyncio.wait((stream, disconnected), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            disconnected.cancel()
+            if not stream.done():
+                stream.cancel()
+                await asyncio.wait((stream,))
+        if not stream.cancelled():
+            stream.result()
+
+    async def stream_content(self, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers()})
+        async for chunk in self.iterate_content(self.content):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def wait_for_disconnect(receive: Receive, body_read: Optional[asyncio.Event] = None) -> None:
+    """
+    Return when the client disconnects. With `body_read`, the event set by `Request.stream()`, only
+    start receiving once the request body has been read, so no body message is taken from it.
+    """
+    if body_read is not None:
+        await body_read.wait()
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+class FileResponse(Response[Union[str, "os.PathLike[str]"]]):
+    """
+    Send a file from disk.
+
+    `content-length`, `last-modified` and `etag` come from a single `stat` call. If the server supports the
+    `http.response.pathsend` extension the path is handed to it, otherwise the file is read in `chunk_size`
+    pieces in the thread pool. Single and multiple byte ranges are answered with 206, unsatisfiable ones
+    with 416.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        content: Union[str, "os.PathLike[str]"],
+        status_code: int = status.HTTP_200_OK,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        charset: Optional[str] = None,
+        filename: Optional[str] = None,
+    ) -> None:
+        if media_type is None:
+            media_type = mimetypes.guess_type(filename or content)[0] or "application/octet-stream"
+        super().__init__(content, status_code, headers, media_type, charset)
+        if filename is not None:
+            self.headers.setdefault("content-disposition", f'attachment; filename="{filename}"')
+
+    async def serialize_content(self, content: Union[str, "os.PathLike[str]"]) -> bytes:
+        return await run_in_threadpool(read_file, content)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        stat_result = await run_in_threadpool(os.stat, self.content)
+        if not stat.S_ISREG(stat_result.st_mode):
+            raise RuntimeError(f"File at path {self.content} is not a file.")
+        size = stat_result.st_size
+        headers = MutableHeaders(self.headers)
+        headers.setdefault("accept-ranges", "bytes")
+        headers.setdefault("last-modified", formatdate(stat_result.st_mtime, usegmt=True))
+        headers.setdefault("etag", f'"{stat_result.st_mtime_ns:x}-{size:x}"')
+        if self.is_not_modified(scope, headers):
+            await send_not_modified(send, self.raw_headers(headers))
+            return
+
+        ranges = None
+        if self.status_code == status.HTTP_200_OK:
+            request_headers = {key: value for key, value in scope.get("headers", ()) if key in _RANGE_HEADERS}
+            range_header = request_headers.get(b"range")
+            if_range = request_headers.get(b"if-range")
+            if range_header is not None and (
+                if_range is None or if_range.decode("latin-1") in (headers["etag"], headers["last-modified"])
+            ):
+                ranges = parse_range_header(range_header.decode("latin-1"), size)
+
+        status_code = self.status_code
+        body_parts: List[Tuple[bytes, int, int]] = [(b"", 0, size)]
+        trailer = b""
+        if ranges is not None:
+            if not ranges:
+                headers["content-range"] = f"bytes */{size}"
+                headers["content-length"] = "0"
+                await send(
+                    {
+                        "type": "http.response.start",
+                        "status": status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                        "headers": self.raw_headers(headers),
+                    }
+                )
+                await send({"type": "http.response.body", "body": b""})
+                return
+            status_code = status.HTTP_206_PARTIAL_CONTENT
+            if len(ranges) == 1:
+                start, end = ranges[0]
+                headers["content-range"] = f"bytes {start}-{end - 1}/{size}"
+                body_parts = [(b"", start, end)]
+            else:
+                boundary = secrets.token_hex(16)
+                content_type = headers.get("content-type", self.media_type)
+                headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+                body_parts = [
+                    (
+                        (
+                            f"--{boundary}\r\ncontent-type: {content_type}\r\n"
+                            f"content-range: bytes {start}-{end - 1}/{size}\r\n\r\n"
+                        ).encode("latin-1"),
+                        start,
+                        end,
+                    )
+                    for start, end in ranges
+                ]
+                trailer = f"--{boundary}--\r\n".encode("latin-1")
+        content_length = sum(len(part_header) + end - start for part_header, start, end in body_parts)
+        if len(body_parts) > 1:
+            content_length += 2 * len(body_parts) + len(trailer)
+        headers["content-length"] = str(content_length)
+
+        await send({"type": "http.response.start", "status": status_code, "headers": self.raw_headers(headers)})
+        if scope.get("method") == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+        elif status_code == status.HTTP_200_OK and "http.response.pathsend" in scope.get("extensions", {}):
+            await send({"type": "http.response.pathsend", "path": os.fspath(self.content)})
+        else:
+            await self.send_file(send, body_parts, trailer)
+
+    async def send_file(self, send: Send, body_parts: List[Tuple[bytes, int, int]], trailer: bytes) -> None:
+        file = await run_in_threadpool(open, self.content, "rb")
+        try:
+            for part_header, start, end in body_parts:
+                if part_header:
+                    await send({"type": "http.response.body", "body": part_header, "more_body": True})
+                await run_in_threadpool(file.seek, start)
+                remaining = end - start
+                while remaining > 0:
+                    chunk = await run_in_threadpool(file.read, min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                if part_header:
+                    await send({"type": "http.response.body", "body": b"\r\n", "more_body": True})
+        finally:
+            await run_in_threadpool(file.close)
+        await send({"type": "http.response.body", "body": trailer})
+
+
+_NO_COOKIES: Mapping[str, str] = MappingProxyType({})
+# Cookie names must be an RFC 6265 token.
+_COOKIE_NAME_REGEX = re.compile(r"[!#$%&'*+\-.^_`|~0-9A-Za-z]+")
+# Values are quoted exactly like `http.cookies` does: left alone if made of these characters only, else
+# put in double quotes with the characters outside `_COOKIE_UNESCAPED` escaped in octal.
+_COOKIE_LEGAL = string.ascii_letters + string.digits + "!#$%&'*+-.^_`|~:"
+_COOKIE_UNESCAPED = _COOKIE_LEGAL + " ()/<=>?@[]{}"
+_COOKIE_VALUE_REGEX = re.compile(f"[{re.escape(_COOKIE_LEGAL)}]+")
+_COOKIE_VALUE_TRANSLATION = {
+    **{i: f"\\{i:03o}" for i in range(0x100) if chr(i) not in _COOKIE_UNESCAPED},
+    ord('"'): '\\"',
+    ord("\\"): "\\\\",
+}
+_COOKIE_ATTRIBUTE_REGEX = re.compile(r"[\x00-\x1f\x7f;]")
+_RANGE_HEADERS = (b"range", b"if-range")
+_CONDITIONAL_HEADERS = (b"if-none-match", b"if-modified-since")
+_NOT_MODIFIED_HEADERS = (b"etag", b"cache-control", b"content-location", b"date", b"expires", b"vary")
+_RANGE_SPEC_REGEX = re.compile(r"([0-9]*)-([0-9]*)")
+
+
+def quote_cookie_value(value: str) -> str:
+    if _COOKIE_VALUE_REGEX.fullmatch(value):
+        return value
+    return '"' + value.translate(_COOKIE_VALUE_TRANSLATION) + '"'
+
+
+@lru_cache(maxsize=128)
+def cookie_attributes(
+    max_age: Optional[int] = None,
+    path: Optional[str] = "/",
+    domain: Optional[str] = None,
+    secure: bool = False,
+    httponly: bool = False,
+    samesite: Optional[Literal["strict", "lax", "none"]] = "lax",
+) -> str:
+    """
+    Render the `Set-Cookie` attributes following the value. Results are memoized, keep one in a constant
+    and pass it as `set_cookie(..., attributes=...)` to skip even that lookup.
+
+    A `path` or `domain` containing a control character or `;` raises ValueError.
+    """
+    for name, value in (("path", path), ("domain", domain)):
+        if value is not None and _COOKIE_ATTRIBUTE_REGEX.search(value):
+            raise ValueError(f"Invalid cookie {name} {value!r}.")
+    attributes = ""
+    if max_age is not None:
+        attributes += f"; Max-Age={max_age}"
+    if path is not None:
+        attributes += f"; Path={path}"
+    if domain is not None:
+        attributes += f"; Domain={domain}"
+    if secure:
+        attributes += "; Secure"
+    if httponly:
+        attributes += "; HttpOnly"
+    if samesite is not None:
+        attributes += f"; SameSite={samesite}"
+    return attributes
+
+
+def make_etag(token: str, weak: bool = False) -> str:
+    etag = f'"{token}"'
+    return "W/" + etag if weak else etag
+
+
+def body_etag(body: bytes, weak: bool = False) -> str:
+    if weak:
+        return make_etag(f"{len(body):x}-{zlib.crc32(body):08x}", weak=True)
+    return make_etag(hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+def is_not_modified(
+    request_headers: Iterable[Tuple[bytes, bytes]], etag: Optional[str], last_modified: Optional[str]
+) -> bool:
+    """
+    Evaluate the request's `If-None-Match` (weak comparison) or, only when it is absent,
+    `If-Modified-Since` against the response's validators.
+    """
+    conditions = {key.lower(): value for key, value in request_headers if key.lower() in _CONDITIONAL_HEADERS}
+    if_none_match = conditions.get(b"if-none-match")
+    if if_none_match is not None:
+        if etag is None:
+            return False
+        tags = if_none_match.decode("latin-1")
+        if tags.strip() == "*":
+            return True
+        target = etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == target for tag in tags.split(","))
+    if_modified_since = conditions.get(b"if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since.decode("latin-1"))
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def check_not_modified(
+    request: Any, etag: Optional[str] = None, last_modified: Optional[float] = None, *, weak: bool = False
+) -> Optional[Response]:
+    """
+    Let a handler that knows its version up front skip the work: return an empty 304 if the request
+    already has the representation tagged `etag` (a token quoted here, as in `Response.set_etag`) or
+    modified at the `last_modified` timestamp, None otherwise.
+    """
+    if request["method"] not in ("GET", "HEAD"):
+        return None
+    headers = {}
+    if etag is not None:
+        headers["etag"] = make_etag(etag, weak)
+    if last_modified is not None:
+        headers["last-modified"] = formatdate(last_modified, usegmt=True)
+    if not is_not_modified(request["headers"], headers.get("etag"), headers.get("last-modified")):
+        return None
+    return NotModifiedResponse(headers)
+
+
+async def send_not_modified(send: Send, raw_headers: List[Tuple[bytes, bytes]]) -> None:
+    headers = [(key, value) for key, value in raw_headers if key in _NOT_MODIFIED_HEADERS]
+    await send({"type": "http.response.start", "status": status.HTTP_304_NOT_MODIFIED, "headers": headers})
+    await send({"type": "http.response.body", "body": b""})
+
+
+class NotModifiedResponse(Response[bytes]):
+    """
+    An empty 304, only the headers a 304 may carry are sent.
+    """
+
+    def __init__(self, headers: Optional[Mapping[str, str]] = None) -> None:
+        super().__init__(b"", status.HTTP_304_NOT_MODIFIED, headers)
+
+    async def serialize_content(self, content: bytes) -> bytes:
+        return content
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send_not_modified(send, self.raw_headers())
+
+
+def read_file(path: Union[str, "os.PathLike[str]"]) -> bytes:
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def parse_range_header(value: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parse a `Range` header into sorted, merged `[start, end)` ranges within a file of `size` bytes.
+
+    Return None if the header is malformed or not in bytes (it must be ignored), or an empty list if no
+    range can be satisfied.
+    """
+    unit, _, specs = value.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    ranges: List[Tuple[int, int]] = []
+    for spec in specs.split(","):
+        matched = _RANGE_SPEC_REGEX.fullmatch(spec.strip())
+        if matched is None:
+            return None
+        first, last = matched.groups()
+        if first:
+            start, end = int(first), size
+            if last:
+                end = int(last) + 1
+                if end <= start:
+                    return None
+        elif last:
+            start, end = max(size - int(last), 0), size
+        else:
+            return None
+        if start < min(end, size):
+            ranges.append((start, min(end, size)))
+
+    ranges.sort()
+    merged: List[Tuple[int, int]] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
 
 
 class Headers(Mapping[str, str]):
@@ -169,6 +794,9 @@ class MutableHeaders(Headers):
     def __delitem__(self, key: str) -> None:
         del self._dict[key.lower()]
 
+    def setdefault(self, key: str, value: str) -> str:
+        return self._dict.setdefault(key.lower(), value)
+
     def append(self, key: str, value: str) -> None:
         key = key.lower()
         if key in self._dict:
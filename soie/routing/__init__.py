@@ -1,4 +1,4 @@
 from .routers import Router
-from .routes import Route
+from .routes import Route, WebSocketRoute
 
-__all__ = ["Router", "Route"]
+__all__ = ["Router", "Route", "WebSocketRoute"]
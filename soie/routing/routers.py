@@ -3,84 +3,196 @@ from __future__ import annotations
 import dataclasses
 import os
 import re
-from typing import Callable, Collection, Dict, Iterable, List, Optional, cast
+from collections import OrderedDict
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+    cast,
+)
 
-from ..exceptions import HTTPException, ParamNotMatched
+from ..exceptions import HTTPException
 from ..requests import Request
-from ..views import AllowMethod, View, require_http_method
-from .routes import ParamConvertor, Route
+from ..views import AllowMethod, View
+from ..websockets import WebSocket, WebSocketView
+from .routes import ParamConvertor, Route, WebSocketRoute
+
+TreeMatcher = Callable[[str, Dict[str, Any]], Optional[Route]]
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
 
 
 class Router:
-    def __init__(self, routes: Iterable[Route] = ()) -> None:
+    """
+    Radix tree router.
+
+    Routes without path params are resolved from `static_routes` directly. Set `cache_size` to keep the
+    results of up to that many parameterized lookups in an LRU cache keyed by the raw path.
+
+    `compile()` replaces the tree walk with a matcher generated from the current tree, adding a route
+    afterwards falls back to the tree walk until `compile()` is called again.
+
+    WebSocket routes live in a tree of their own, so they never shadow or slow down HTTP routes.
+    """
+
+    def __init__(
+        self, routes: Iterable[Union[Route, WebSocketRoute]] = (), *, cache_size: Optional[int] = None
+    ) -> None:
+        if cache_size is not None and cache_size <= 0:
+            raise ValueError("cache_size must be a positive integer.")
         self.root = RadixTreeNode("/")
+        self.static_routes: Dict[str, Route] = {}
+        self.cache_size = cache_size
+        self._cache: Optional[OrderedDict[str, Tuple[Route, Dict[str, Any]]]] = (
+            None if cache_size is None else OrderedDict()
+        )
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        self._match_tree: TreeMatcher = self._search_tree
+        self.websocket_root = RadixTreeNode("/")
         for route in routes:
-            self.add_route(route)
+            if isinstance(route, WebSocketRoute):
+                self.add_websocket_route(route)
+            else:
+                self.add_route(route)
 
     @property
     def http(self) -> HTTPRouteRegister:
         return HTTPRouteRegister(self)
 
+    @property
+    def compiled(self) -> bool:
+        return self._match_tree != self._search_tree
+
+    def compile(self) -> None:
+        try:
+            self._match_tree = compile_tree(self.root)
+        except (SyntaxError, RecursionError, MemoryError):
+            # The tree is too deep for the Python compiler, keep walking it.
+            self._match_tree = self._search_tree
+
     def add_route(self, route: Route) -> Router:
+        self._match_tree = self._search_tree
+        if self._cache is not None:
+            self._cache.clear()
         compiled_path, param_convertors = route.compiled_path, route.param_convertors
         node = insert_node(self.root, compiled_path[1:], param_convertors)
         if node.route is not None:
-            raise ValueError(f"Handler are already registered for path '{compiled_path}'.")
+            node.route.merge(route)
+            return self
+        node.route = route
+        if not param_convertors:
+            self.static_routes[compiled_path] = route
+        return self
+
+    def websocket(self, path: str) -> Callable[[WebSocketView], WebSocketView]:
+        def register(endpoint: WebSocketView) -> WebSocketView:
+            self.add_websocket_route(WebSocketRoute(path, endpoint))
+            return endpoint
+
+        return register
+
+    def add_websocket_route(self, route: WebSocketRoute) -> Router:
+        node = insert_node(self.websocket_root, route.compiled_path[1:], route.param_convertors)
+        if node.route is not None:
+            raise ValueError(f"WebSocket handler is already registered for path '{route.compiled_path}'.")
         node.route = route
         return self
 
+    def search_websocket(self, websocket: WebSocket) -> Optional[WebSocketRoute]:
+        path = websocket["path"]
+        params: Dict[str, Any] = {}
+        route = search_node(self.websocket_root, path, 0, len(path), params)
+        if route is not None:
+            websocket.path_params = params
+        return cast(Optional[WebSocketRoute], route)
+
     def get_route(self, request: Request) -> Route:
         route = self.search(request)
         if route is None:
             raise HTTPException(404)
         return route
 
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(
+            self.cache_hits,
+            self.cache_misses,
+            self.cache_evictions,
+            self.cache_size or 0,
+            0 if self._cache is None else len(self._cache),
+        )
+
     def search(self, request: Request) -> Optional[Route]:
         path = request["path"]
-        stack = [(path, self.root)]
-        params = {}
-        while stack:
-            path, node = stack.pop()
-            if node.convertor is None:
-                if not path.startswith(node.characters):
-                    continue
-                length = len(node.characters)
-            else:
-                try:
-                    matched_var = node.convertor.match(path)
-                except ParamNotMatched:
-                    continue
-                length = len(matched_var)
-                params[node.characters] = node.convertor.to_python(matched_var)
-            if length == len(path):
+        route = self.static_routes.get(path)
+        if route is not None:
+            request.path_params = {}
+            return route
+
+        cache = self._cache
+        if cache is None:
+            params: Dict[str, Any] = {}
+            route = self._match_tree(path, params)
+            if route is not None:
                 request.path_params = params
-                return node.route
-            path = path[length:]
-            for child in node.children or ():
-                stack.append((path, child))
-        return None
+            return route
+
+        cached = cache.get(path)
+        if cached is not None:
+            cache.move_to_end(path)
+            self.cache_hits += 1
+            route, params = cached
+            request.path_params = params.copy()
+            return route
+        self.cache_misses += 1
+        params = {}
+        route = self._match_tree(path, params)
+        if route is not None:
+            request.path_params = params.copy()
+            cache[path] = (route, params)
+            if len(cache) > cast(int, self.cache_size):
+                cache.popitem(last=False)
+                self.cache_evictions += 1
+        return route
+
+    def _search_tree(self, path: str, params: Dict[str, Any]) -> Optional[Route]:
+        return search_node(self.root, path, 0, len(path), params)
 
 
 class HTTPRouteRegister:
     def __init__(self, router: Router) -> None:
         self._router = router
 
-    def get(self, path: str) -> Callable[[View], View]:
-        return self._register_with_method(("GET",), path)
+    def get(self, path: str, *, max_body_size: Optional[int] = None) -> Callable[[View], View]:
+        return self._register_with_method(("GET",), path, max_body_size)
 
-    def post(self, path: str) -> Callable[[View], View]:
-        return self._register_with_method(("POST",), path)
+    def post(self, path: str, *, max_body_size: Optional[int] = None) -> Callable[[View], View]:
+        return self._register_with_method(("POST",), path, max_body_size)
 
-    def put(self, path: str) -> Callable[[View], View]:
-        return self._register_with_method(("PUT",), path)
+    def put(self, path: str, *, max_body_size: Optional[int] = None) -> Callable[[View], View]:
+        return self._register_with_method(("PUT",), path, max_body_size)
 
-    def patch(self, path: str) -> Callable[[View], View]:
-        return self._register_with_method(("PATCH",), path)
+    def patch(self, path: str, *, max_body_size: Optional[int] = None) -> Callable[[View], View]:
+        return self._register_with_method(("PATCH",), path, max_body_size)
 
-    def delete(self, path: str) -> Callable[[View], View]:
-        return self._register_with_method(("DELETE",), path)
+    def delete(self, path: str, *, max_body_size: Optional[int] = None) -> Callable[[View], View]:
+        return self._register_with_method(("DELETE",), path, max_body_size)
 
-    def any(self, path: str) -> Callable[[View], View]:
+    def any(self, path: str, *, max_body_size: Optional[int] = None) -> Callable[[View], View]:
         return self._register_with_method(
             (
                 "GET",
@@ -90,14 +202,15 @@ class HTTPRouteRegister:
                 "DELETE",
             ),
             path,
+            max_body_size,
         )
 
-    def _register_with_method(self, methods: Collection[AllowMethod], path: str) -> Callable[[View], View]:
+    def _register_with_method(
+        self, methods: Collection[AllowMethod], path: str, max_body_size: Optional[int] = None
+    ) -> Callable[[View], View]:
         def register(endpoint: View) -> View:
-            wrapped_endpoint = require_http_method(methods)(endpoint)
-            route = Route(path, wrapped_endpoint)
-            self._router.add_route(route)
-            return wrapped_endpoint
+            self._router.add_route(Route(path, endpoint, methods, max_body_size=max_body_size))
+            return endpoint
 
         return register
 
@@ -107,10 +220,94 @@ class HTTPRouteRegister:
 class RadixTreeNode:
     characters: str
     convertor: Optional[ParamConvertor] = None
-    route: Optional[Route] = None
+    route: Optional[Union[Route, WebSocketRoute]] = None
     children: Optional[List[RadixTreeNode]] = None
 
 
+def search_node(node: RadixTreeNode, path: str, pos: int, end: int, params: Dict[str, Any]) -> Optional[Any]:
+    """
+    Match `path[pos:end]` against the subtree of `node`.
+
+    Only the offset into `path` moves down the tree, no substring is created per level. Children are
+    tried from the end of the list, and params set by a branch that fails are removed again.
+    """
+    convertor = node.convertor
+    if convertor is None:
+        if not path.startswith(node.characters, pos):
+            return None
+        pos += len(node.characters)
+    else:
+        matched = convertor.regex.match(path, pos)
+        if matched is None:
+            return None
+        pos = matched.end()
+        params[node.characters] = convertor.to_python(matched.group())
+        del matched
+
+    route = None
+    if pos == end:
+        route = node.route
+    elif node.children is not None:
+        children = node.children
+        index = len(children)
+        while index:
+            index -= 1
+            route = search_node(children[index], path, pos, end, params)
+            if route is not None:
+                return route
+    if route is None and convertor is not None:
+        del params[node.characters]
+    return route
+
+
+def compile_tree(root: RadixTreeNode) -> TreeMatcher:
+    """
+    Generate a function equivalent to `search_node(root, path, 0, len(path), params)`.
+
+    Every node becomes a nested `if` block: static nodes are inlined `startswith` checks with their length
+    folded in, param nodes call their precompiled regex. A block that does not return falls through to the
+    next sibling, which is the same backtracking order as `search_node`.
+    """
+    namespace: Dict[str, Any] = {}
+    lines = ["def match(path, params):", "    end = len(path)"]
+
+    def constant(prefix: str, value: Any) -> str:
+        name = f"{prefix}{len(namespace)}"
+        namespace[name] = value
+        return name
+
+    def emit(node: RadixTreeNode, depth: int, indent: str) -> None:
+        pos, parent_pos = f"p{depth}", f"p{depth - 1}" if depth else "0"
+        convertor = node.convertor
+        if convertor is None:
+            lines.append(f"{indent}if path.startswith({node.characters!r}, {parent_pos}):")
+            lines.append(f"{indent}    {pos} = {parent_pos} + {len(node.characters)}")
+        else:
+            regex = constant("regex", convertor.regex)
+            to_python = constant("to_python", convertor.to_python)
+            lines.append(f"{indent}m = {regex}.match(path, {parent_pos})")
+            lines.append(f"{indent}if m is not None:")
+            lines.append(f"{indent}    {pos} = m.end()")
+            lines.append(f"{indent}    params[{node.characters!r}] = {to_python}(m.group())")
+        body = indent + "    "
+        if node.route is not None:
+            lines.append(f"{body}if {pos} == end:")
+            lines.append(f"{body}    return {constant('route', node.route)}")
+        if node.children:
+            lines.append(f"{body}if {pos} != end:")
+            for child in reversed(node.children):
+                emit(child, depth + 1, body + "    ")
+        if convertor is not None:
+            lines.append(f"{body}del params[{node.characters!r}]")
+        elif node.route is None and not node.children:
+            lines.append(f"{body}pass")
+
+    emit(root, 0, "    ")
+    lines.append("    return None")
+    exec(compile("\n".join(lines), "<soie.routing.compile_tree>", "exec"), namespace)
+    return namespace["match"]
+
+
 def insert_node(node: RadixTreeNode, path: str, param_convertors: Dict[str, ParamConvertor]) -> RadixTreeNode:
     if path == "":
         return node
@@ -1,14 +1,78 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, Protocol, Tuple
+from typing import Any, Collection, Dict, Mapping, Optional, Pattern, Protocol, Tuple
 
 from ..exceptions import ParamNotMatched
-from ..views import View
+from ..views import View, allow_headers, method_not_allowed_view, options_view
+from ..websockets import WebSocketView
 
 
 class Route:
-    def __init__(self, path: str, endpoint: View) -> None:
+    """
+    A path with its views.
+
+    If `methods` is None, `endpoint` handles every HTTP method. Otherwise the route keeps a method -> view
+    dispatch table, answering HEAD with the GET view and OPTIONS / unknown methods with prebuilt views
+    carrying the `Allow` header.
+
+    `max_body_size` overrides the application's request body limit for this path.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        endpoint: View,
+        methods: Optional[Collection[str]] = None,
+        *,
+        max_body_size: Optional[int] = None,
+    ) -> None:
+        assert path.startswith("/") and not path.endswith("/"), "Route path must start with '/' and not end with '/'."
+
+        self.path = path
+        self.endpoint = endpoint
+        self.compiled_path, self.param_convertors = compile_path(path)
+        self.handlers: Dict[str, View] = {}
+        self.endpoints: Dict[str, View] = {}
+        self.fallback: View = endpoint
+        self.max_body_size = max_body_size
+        if methods is not None:
+            self.add_handlers({method: endpoint for method in methods})
+
+    def get_endpoint(self, method: str) -> View:
+        return self.endpoints.get(method, self.fallback)
+
+    def add_handlers(self, handlers: Mapping[str, View]) -> None:
+        duplicated = self.handlers.keys() & handlers.keys()
+        if duplicated:
+            raise ValueError(f"Handler are already registered for {', '.join(duplicated)} '{self.path}'.")
+        self.handlers.update(handlers)
+
+        endpoints = dict(self.handlers)
+        if "GET" in endpoints and "HEAD" not in endpoints:
+            endpoints["HEAD"] = endpoints["GET"]
+        headers = allow_headers(endpoints)
+        endpoints.setdefault("OPTIONS", options_view(headers))
+        self.endpoints = endpoints
+        self.fallback = method_not_allowed_view(headers)
+
+    def merge(self, route: Route) -> None:
+        if not self.handlers or not route.handlers:
+            raise ValueError(f"Handler are already registered for path '{self.compiled_path}'.")
+        if route.max_body_size is not None:
+            if self.max_body_size is not None and self.max_body_size != route.max_body_size:
+                raise ValueError(f"Different max_body_size are set for path '{self.compiled_path}'.")
+        self.add_handlers(route.handlers)
+        if route.max_body_size is not None:
+            self.max_body_size = route.max_body_size
+
+
+class WebSocketRoute:
+    """
+    A path with its WebSocket view.
+    """
+
+    def __init__(self, path: str, endpoint: WebSocketView) -> None:
         assert path.startswith("/") and not path.endswith("/"), "Route path must start with '/' and not end with '/'."
 
         self.path = path
@@ -17,7 +81,12 @@ class Route:
 
 
 class ParamConvertor(Protocol):
-    def match(self, path: str) -> str:
+    regex: Pattern[str]
+
+    def match(self, path: str, pos: int = 0) -> str:
+        """
+        Return the param value at the start of `path[pos:]`, raise `ParamNotMatched` if there is none.
+        """
         ...
 
     def to_python(self, value: str) -> Any:
@@ -27,11 +96,11 @@ class ParamConvertor(Protocol):
 class RawConvertor:
     regex = re.compile("[^/]+")
 
-    def match(self, path: str) -> str:
-        try:
-            return re.match(self.regex, path).group()
-        except AttributeError:
+    def match(self, path: str, pos: int = 0) -> str:
+        matched = self.regex.match(path, pos)
+        if matched is None:
             raise ParamNotMatched()
+        return matched.group()
 
     def to_python(self, value: str) -> str:
         return value
@@ -1,11 +1,11 @@
 from functools import wraps
 from itertools import chain
-from typing import Any, Awaitable, Callable, Collection
+from typing import Any, Awaitable, Callable, Collection, Dict
 
 from typing_extensions import Literal
 
 from .requests import Request
-from .responses import JSONResponse, PlainTextResponse, Response
+from .responses import JSONResponse, PrebuiltResponse, Response
 
 AllowMethod = Literal["GET", "POST", "PUT", "DELETE", "PATCH"]
 View = Callable[[Request], Awaitable[Response]]
@@ -16,7 +16,9 @@ def require_http_method(methods: Collection[AllowMethod]) -> Callable[[View], Vi
         allow_methods = set(chain(methods, ("HEAD",)))
     else:
         allow_methods = methods
-    headers = {"Allow": ", ".join(allow_methods)}
+    headers = allow_headers(allow_methods)
+    options = options_view(headers)
+    method_not_allowed = method_not_allowed_view(headers)
 
     def decorator(func: View) -> View:
         @wraps(func)
@@ -24,15 +26,37 @@ def require_http_method(methods: Collection[AllowMethod]) -> Callable[[View], Vi
             if request.method in allow_methods:
                 return await func(request)
             elif request.method == "OPTIONS":
-                return PlainTextResponse(headers=headers)
+                return await options(request)
             else:
-                return PlainTextResponse(status_code=405, headers=headers)
+                return await method_not_allowed(request)
 
         return inner
 
     return decorator
 
 
+def allow_headers(methods: Collection[str]) -> Dict[str, str]:
+    return {"Allow": ", ".join(methods)}
+
+
+def options_view(headers: Dict[str, str]) -> View:
+    response = PrebuiltResponse(headers=headers)
+
+    async def options(request: Request) -> Response:
+        return response
+
+    return options
+
+
+def method_not_allowed_view(headers: Dict[str, str]) -> View:
+    response = PrebuiltResponse(status_code=405, headers=headers)
+
+    async def method_not_allowed(request: Request) -> Response:
+        return response
+
+    return method_not_allowed
+
+
 def auto_json_response(func: Callable[[Request], Awaitable[Any]]) -> View:
     @wraps(func)
     async def inner(request: Request) -> JSONResponse:
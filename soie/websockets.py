@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import asyncio
+import enum
+import json
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from typing_extensions import Literal
+
+from . import status
+from .encoders import JSONEncoder, default_json_encoder, get_json_encoder
+from .exceptions import WebSocketDisconnect
+from .requests import QueryParams, RequestHeaders
+from .types import Message, Receive, Scope, Send
+
+
+class WebSocketState(enum.Enum):
+    CONNECTING = 0
+    CONNECTED = 1
+    DISCONNECTED = 2
+
+
+class WebSocket:
+    """
+    WebSocket connection wrapped around ASGI's websocket scope.
+
+    `accept()` must be called before sending or receiving. Receiving the client's close raises
+    `WebSocketDisconnect`, the `iter_*` methods stop on it instead.
+    """
+
+    __slots__ = ("_scope", "_receive", "_send", "_headers", "_query_params", "state")
+
+    def __init__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "websocket"
+        self._scope = scope
+        self._receive = receive
+        self._send = send
+        self._headers: Optional[RequestHeaders] = None
+        self._query_params: Optional[QueryParams] = None
+        self.state = WebSocketState.CONNECTING
+
+    def __getitem__(self, key: str) -> Any:
+        return self._scope[key]
+
+    @property
+    def path_params(self) -> dict[str, Any]:
+        return self._scope.get("path_params", {})
+
+    @path_params.setter
+    def path_params(self, params):
+        self._scope["path_params"] = params
+
+    @property
+    def headers(self) -> RequestHeaders:
+        if self._headers is None:
+            self._headers = RequestHeaders(self._scope.get("headers", ()))
+        return self._headers
+
+    @property
+    def query_params(self) -> QueryParams:
+        if self._query_params is None:
+            self._query_params = QueryParams(self._scope.get("query_string", b""))
+        return self._query_params
+
+    async def accept(self, subprotocol: Optional[str] = None, headers: Iterable[Tuple[str, str]] = ()) -> None:
+        if self.state is not WebSocketState.CONNECTING:
+            raise RuntimeError("WebSocket has already been accepted or closed.")
+        message = await self._receive()
+        if message["type"] != "websocket.connect":
+            raise RuntimeError(f"Expected 'websocket.connect', got {message['type']!r}.")
+        await self._send(
+            {
+                "type": "websocket.accept",
+                "subprotocol": subprotocol,
+                "headers": [(key.lower().encode("latin-1"), value.encode("latin-1")) for key, value in headers],
+            }
+        )
+        self.state = WebSocketState.CONNECTED
+
+    async def receive(self) -> Message:
+        if self.state is not WebSocketState.CONNECTED:
+            raise RuntimeError("WebSocket is not connected, call accept() first.")
+        message = await self._receive()
+        if message["type"] == "websocket.disconnect":
+            self.state = WebSocketState.DISCONNECTED
+            raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE), message.get("reason"))
+        return message
+
+    async def receive_text(self) -> str:
+        message = await self.receive()
+        text = message.get("text")
+        if text is None:
+            return message["bytes"].decode("utf-8")
+        return text
+
+    async def receive_bytes(self) -> bytes:
+        message = await self.receive()
+        data = message.get("bytes")
+        if data is None:
+            return message["text"].encode("utf-8")
+        return data
+
+    async def receive_json(self) -> Any:
+        message = await self.receive()
+        text = message.get("text")
+        return json.loads(message["bytes"] if text is None else text)
+
+    async def iter_text(self) -> AsyncIterator[str]:
+        try:
+            while True:
+                yield await self.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        try:
+            while True:
+                yield await self.receive_bytes()
+        except WebSocketDisconnect:
+            pass
+
+    async def iter_json(self) -> AsyncIterator[Any]:
+        try:
+            while True:
+                yield await self.receive_json()
+        except WebSocketDisconnect:
+            pass
+
+    async def send(self, message: Message) -> None:
+        if self.state is WebSocketState.DISCONNECTED:
+            raise RuntimeError("WebSocket is closed.")
+        if message["type"] == "websocket.close":
+            self.state = WebSocketState.DISCONNECTED
+        await self._send(message)
+
+    async def send_text(self, data: str) -> None:
+        await self.send({"type": "websocket.send", "text": data})
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self.send({"type": "websocket.send", "bytes": data})
+
+    async def send_json(self, data: Any, mode: Literal["text", "binary"] = "text") -> None:
+        """
+        Encode `data` with the application's JSON backend and send it as a text or binary frame.
+        """
+        await self.send(json_message(data, self.json_encoder, mode))
+
+    async def close(self, code: int = status.WS_1000_NORMAL_CLOSURE, reason: str = "") -> None:
+        """
+        Close the connection, a no-op if it is already closed. Closing before `accept()` rejects the
+        handshake.
+        """
+        if self.state is not WebSocketState.DISCONNECTED:
+            await self.send({"type": "websocket.close", "code": code, "reason": reason})
+
+    @property
+    def json_encoder(self) -> JSONEncoder:
+        return getattr(self._scope.get("app"), "json_encoder", None) or default_json_encoder
+
+
+WebSocketView = Callable[[WebSocket], Awaitable[None]]
+
+
+def json_message(data: Any, json_encoder: JSONEncoder, mode: Literal["text", "binary"] = "text") -> Message:
+    encoded = json_encoder(data)
+    if mode == "text":
+        return {"type": "websocket.send", "text": encoded.decode("utf-8")}
+    return {"type": "websocket.send", "bytes": encoded}
+
+
+class WebSocketGroup:
+    """
+    A set of connections receiving the same messages.
+
+    A broadcast is serialized once into a single ASGI message shared by every member. Each member has its
+    own task sending from a queue of at most `max_queue_size` messages, so a slow client never holds up the
+    others. When a member's queue is full it is closed with 1013 (`slow_consumer="drop"`), or just misses
+    that message (`slow_consumer="skip"`); `dropped` and `skipped` count both cases.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_queue_size: int = 32,
+        slow_consumer: Literal["drop", "skip"] = "drop",
+        json_encoder: Union[str, JSONEncoder, None] = None,
+    ) -> None:
+        if max_queue_size <= 0:
+            raise ValueError("max_queue_size must be a positive integer.")
+        if slow_consumer not in ("drop", "skip"):
+            raise ValueError("slow_consumer must be 'drop' or 'skip'.")
+        self.max_queue_size = max_queue_size
+        self.slow_consumer = slow_consumer
+        self.json_encoder = None if json_encoder is None else get_json_encoder(json_encoder)
+        self.dropped = 0
+        self.skipped = 0
+        self._members: Dict[WebSocket, Tuple[asyncio.Queue[Message], asyncio.Task[None]]] = {}
+        self._closing: Set[asyncio.Task[None]] = set()
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __contains__(self, websocket: object) -> bool:
+        return websocket in self._members
+
+    def add(self, websocket: WebSocket) -> None:
+        if websocket in self._members:
+            return
+        queue: asyncio.Queue[Message] = asyncio.Queue(self.max_queue_size)
+        self._members[websocket] = (queue, asyncio.create_task(self._send_queued(websocket, queue)))
+
+    async def remove(self, websocket: WebSocket) -> None:
+        """
+        Stop sending to `websocket`, messages still queued for it are discarded.
+        """
+        member = self._members.pop(websocket, None)
+        if member is not None:
+            task = member[1]
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    @asynccontextmanager
+    async def join(self, websocket: WebSocket) -> AsyncIterator[WebSocket]:
+        self.add(websocket)
+        try:
+            yield websocket
+        finally:
+            await self.remove(websocket)
+
+    def broadcast(self, message: Message) -> int:
+        """
+        Queue `message` for every member without waiting, return the number of members it was queued for.
+        """
+        queued = 0
+        for websocket, (queue, task) in list(self._members.items()):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                if self.slow_consumer == "skip":
+                    self.skipped += 1
+                else:
+                    self._drop(websocket, task)
+            else:
+                queued += 1
+        return queued
+
+    def broadcast_text(self, data: str) -> int:
+        return self.broadcast({"type": "websocket.send", "text": data})
+
+    def broadcast_bytes(self, data: bytes) -> int:
+        return self.broadcast({"type": "websocket.send", "bytes": data})
+
+    def broadcast_json(self, data: Any, mode: Literal["text", "binary"] = "text") -> int:
+        return self.broadcast(json_message(data, self.json_encoder or default_json_encoder, mode))
+
+    async def _send_queued(self, websocket: WebSocket, queue: asyncio.Queue[Message]) -> None:
+        try:
+            while True:
+                await websocket.send(await queue.get())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # The connection is gone, stop sending to it.
+            self._members.pop(websocket, None)
+
+    def _drop(self, websocket: WebSocket, task: asyncio.Task[None]) -> None:
+        del self._members[websocket]
+        self.dropped += 1
+        task.cancel()
+        closing = asyncio.create_task(self._close_slow(websocket, task))
+        self._closing.add(closing)
+        closing.add_done_callback(self._closing.discard)
+
+    async def _close_slow(self, websocket: WebSocket, task: asyncio.Task[None]) -> None:
+        await asyncio.gather(task, return_exceptions=True)
+        try:
+            await websocket.close(status.WS_1013_TRY_AGAIN_LATER, "Too slow to keep up with the broadcast.")
+        except Exception:
+            pass
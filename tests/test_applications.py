@@ -1,8 +1,17 @@
+import asyncio
+import gc
+import sys
+import time
+
 import pytest
 from async_asgi_testclient import TestClient
 
-from soie.applications import Soie
-from soie.responses import PlainTextResponse
+from soie.applications import Hook, LifeSpan, Soie
+from soie.exceptions import HTTPException
+from soie.middleware import Middleware
+from soie.requests import Request
+from soie.responses import PlainTextResponse, StreamingResponse
+from soie.views import auto_json_response
 
 
 @pytest.mark.asyncio
@@ -44,3 +53,386 @@ async def test_add_exception_handler():
 
         with pytest.raises(AttributeError):
             await client.get("/no_catch")
+
+
+@pytest.mark.asyncio
+async def test_method_dispatch():
+    app = Soie()
+
+    @app.router.http.get("/items")
+    async def list_items(request):
+        return PlainTextResponse("list")
+
+    @app.router.http.post("/items")
+    async def create_item(request):
+        return PlainTextResponse("create", 201)
+
+    async with TestClient(app) as client:
+        res = await client.get("/items")
+        assert res.status_code == 200
+        assert res.text == "list"
+
+        res = await client.post("/items")
+        assert res.status_code == 201
+        assert res.text == "create"
+
+        res = await client.delete("/items")
+        assert res.status_code == 405
+        assert res.headers["allow"] == "GET, POST, HEAD"
+
+        res = await client.options("/items")
+        assert res.status_code == 200
+        assert res.headers["allow"] == "GET, POST, HEAD"
+
+
+@pytest.mark.asyncio
+async def test_router_compiled_on_startup():
+    def add_plugin_route():
+        @app.router.http.get("/plugin")
+        async def plugin(request):
+            return PlainTextResponse("plugin")
+
+    app = Soie(on_startup=[add_plugin_route])
+
+    @app.router.http.get("/users/{id:int}")
+    async def get_user(request):
+        return PlainTextResponse(str(request.path_params["id"]))
+
+    assert not app.router.compiled
+    async with TestClient(app) as client:
+        assert app.router.compiled
+        assert list(app.lifespan_timings["startup"]) == ["test_router_compiled_on_startup.<locals>.add_plugin_route"]
+        res = await client.get("/users/42")
+        assert res.text == "42"
+        res = await client.get("/plugin")
+        assert res.text == "plugin"
+
+
+@pytest.mark.asyncio
+async def test_max_body_size():
+    app = Soie(max_body_size=4)
+
+    @app.router.http.post("/small")
+    async def small(request):
+        return PlainTextResponse(await request.body())
+
+    @app.router.http.post("/large", max_body_size=16)
+    async def large(request):
+        return PlainTextResponse(await request.body())
+
+    async with TestClient(app) as client:
+        assert (await client.post("/small", data=b"1234")).text == "1234"
+        assert (await client.post("/small", data=b"12345")).status_code == 413
+        assert (await client.post("/large", data=b"0123456789")).text == "0123456789"
+        assert (await client.post("/large", data=b"x" * 17)).status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_json_backend():
+    def encoder(content):
+        return b'{"encoded":true}'
+
+    app = Soie(json_backend=encoder)
+
+    @app.router.http.get("/auto")
+    @auto_json_response
+    async def auto(request):
+        return {"encoded": False}
+
+    @app.router.http.get("/error")
+    async def error(request):
+        raise HTTPException(400)
+
+    async with TestClient(app) as client:
+        assert (await client.get("/auto")).json() == {"encoded": True}
+        res = await client.get("/error")
+        assert res.status_code == 400
+        assert res.json() == {"encoded": True}
+
+
+@pytest.mark.asyncio
+async def test_requests_are_freed_after_response():
+    app = Soie()
+
+    @app.router.http.get("/items/{id:int}")
+    async def get_item(request):
+        request.headers.get("host")
+        return PlainTextResponse(request.method + request.query_params.get("q", ""))
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def run(count):
+        for i in range(count):
+            scope = {
+                "type": "http",
+                "method": "GET",
+                "path": f"/items/{i}",
+                "query_string": b"q=1",
+                "headers": [(b"host", b"example.com")],
+            }
+            await app(scope, receive, send)
+
+    await run(10_000)
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    await run(100_000)
+    gc.collect()
+
+    assert sys.getallocatedblocks() - blocks < 1_000
+    assert not any(isinstance(obj, Request) for obj in gc.get_objects())
+
+
+@pytest.mark.asyncio
+async def test_exception_handler_resolution_follows_mro():
+    class NotFound(HTTPException):
+        def __init__(self):
+            super().__init__(404, message="missing")
+
+    class BaseError(Exception):
+        pass
+
+    class ChildError(BaseError):
+        pass
+
+    app = Soie()
+    assert app.lookup_exception_handler(NotFound) is app.lookup_exception_handler(HTTPException)
+    assert app.lookup_exception_handler(ChildError) is None
+
+    @app.exception_handler(BaseError)
+    async def base_error_handler(request, exc):
+        return PlainTextResponse(type(exc).__name__, 409)
+
+    assert app.lookup_exception_handler(ChildError) is base_error_handler
+
+    @app.router.http.get("/not_found")
+    async def not_found(request):
+        raise NotFound()
+
+    @app.router.http.get("/child_error")
+    async def child_error(request):
+        raise ChildError()
+
+    async with TestClient(app) as client:
+        res = await client.get("/not_found")
+        assert res.status_code == 404
+        assert res.json() == "missing"
+
+        res = await client.get("/child_error")
+        assert res.status_code == 409
+        assert res.text == "ChildError"
+
+
+@pytest.mark.parametrize("debug", [False, True])
+@pytest.mark.asyncio
+async def test_unhandled_exception_response(debug):
+    app = Soie(debug=debug)
+
+    @app.router.http.get("/error")
+    async def error(request):
+        raise AttributeError("attribute error")
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    with pytest.raises(AttributeError):
+        await app({"type": "http", "method": "GET", "path": "/error", "headers": []}, None, send)
+
+    start, body = messages
+    assert start["status"] == 500
+    if debug:
+        assert b"Traceback" in body["body"]
+        assert b"AttributeError: attribute error" in body["body"]
+    else:
+        assert body["body"] == b'"Server got itself in trouble"'
+
+
+@pytest.mark.asyncio
+async def test_exception_after_response_started():
+    app = Soie()
+
+    async def chunks():
+        yield b"a"
+        raise AttributeError("attribute error")
+
+    @app.router.http.get("/stream")
+    async def stream(request):
+        return StreamingResponse(chunks())
+
+    messages = []
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    with pytest.raises(AttributeError):
+        await app({"type": "http", "method": "GET", "path": "/stream", "headers": []}, receive, send)
+
+    assert [message["type"] for message in messages] == ["http.response.start", "http.response.body"]
+    assert messages[0]["status"] == 200 and messages[1]["body"] == b"a"
+
+
+@pytest.mark.asyncio
+async def test_middleware():
+    calls = []
+
+    class HeaderMiddleware:
+        def __init__(self, app, name):
+            self.app = app
+            self.name = name
+
+        async def __call__(self, scope, receive, send):
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    calls.append(self.name)
+                    message["headers"] = [*message["headers"], (b"x-middleware", self.name.encode())]
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+    async def outer(request, call_next):
+        calls.append("outer")
+        response = await call_next(request)
+        response.headers["x-outer"] = "1"
+        return response
+
+    app = Soie(middleware=[outer, Middleware(HeaderMiddleware, name="asgi")])
+
+    @app.add_http_middleware
+    async def inner(request, call_next):
+        calls.append("inner")
+        if request.query_params.get("short"):
+            return PlainTextResponse("short circuit")
+        return await call_next(request)
+
+    @app.router.http.get("/hello")
+    async def hello(request):
+        calls.append("view")
+        return PlainTextResponse("hello")
+
+    async with TestClient(app) as client:
+        res = await client.get("/hello")
+        assert res.text == "hello"
+        assert res.headers["x-outer"] == "1"
+        assert res.headers["x-middleware"] == "asgi"
+        assert calls == ["outer", "inner", "view", "asgi"]
+
+        res = await client.get("/hello?short=1")
+        assert res.text == "short circuit"
+
+        with pytest.raises(RuntimeError):
+            app.add_middleware(HeaderMiddleware, name="late")
+        with pytest.raises(RuntimeError):
+            app.add_http_middleware(inner)
+
+
+@pytest.mark.asyncio
+async def test_middleware_changes_prebuilt_responses_per_request():
+    async def cors(request, call_next):
+        response = await call_next(request)
+        response.headers["access-control-allow-origin"] = "*"
+        if request.query_params.get("teapot"):
+            response.status_code = 418
+        return response
+
+    app = Soie(middleware=[cors])
+
+    @app.router.http.get("/items")
+    async def items(request):
+        return PlainTextResponse("items")
+
+    async with TestClient(app) as client:
+        res = await client.options("/items?teapot=1")
+        assert res.status_code == 418 and res.headers["access-control-allow-origin"] == "*"
+        for method in (client.options, client.delete):
+            res = await method("/items")
+            assert res.status_code in (200, 405) and res.headers["access-control-allow-origin"] == "*"
+
+
+@pytest.mark.asyncio
+async def test_no_middleware_stack_is_app():
+    app = Soie()
+    async with TestClient(app):
+        assert app.middleware_stack == app.app
+
+
+async def run_lifespan(lifespan):
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    await lifespan({"type": "lifespan"}, receive, send)
+    return sent
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lifespan():
+    events = []
+
+    async def open_pool():
+        await asyncio.sleep(0.1)
+        events.append("pool")
+
+    async def warm_up():
+        await asyncio.sleep(0.1)
+        events.append("warm_up")
+
+    def register_routes():
+        events.append("routes")
+
+    app = Soie(
+        on_startup=[Hook(register_routes, group=1), open_pool, warm_up],
+        on_shutdown=[open_pool],
+        concurrent_lifespan=True,
+    )
+    start = time.perf_counter()
+    assert await run_lifespan(app.lifespan) == ["lifespan.startup.completed", "lifespan.shutdown.completed"]
+    assert time.perf_counter() - start < 0.3
+    assert events[2:] == ["routes", "pool"]
+    assert set(app.lifespan_timings["startup"]) >= {
+        "test_concurrent_lifespan.<locals>.open_pool",
+        "test_concurrent_lifespan.<locals>.warm_up",
+        "test_concurrent_lifespan.<locals>.register_routes",
+    }
+    assert app.lifespan_timings["startup"]["test_concurrent_lifespan.<locals>.open_pool"] >= 0.1
+
+
+@pytest.mark.parametrize("concurrent", [False, True])
+@pytest.mark.asyncio
+async def test_lifespan_hook_timeout(concurrent):
+    async def slow():
+        await asyncio.sleep(10)
+
+    lifespan = LifeSpan([Hook(slow, timeout=0.01)], concurrent=concurrent)
+    with pytest.raises(asyncio.TimeoutError):
+        await run_lifespan(lifespan)
+    assert lifespan.timings["startup"]["test_lifespan_hook_timeout.<locals>.slow"] < 1
+
+
+@pytest.mark.asyncio
+async def test_lifespan_timings_are_unique():
+    class Pool:
+        async def open(self):
+            pass
+
+    first, second = Pool(), Pool()
+    lifespan = LifeSpan([first.open, second.open, lambda: None, Hook(lambda: None, name="cache")])
+    await run_lifespan(lifespan)
+    assert list(lifespan.timings["startup"]) == [
+        "test_lifespan_timings_are_unique.<locals>.Pool.open[0]",
+        "test_lifespan_timings_are_unique.<locals>.Pool.open[1]",
+        "test_lifespan_timings_are_unique.<locals>.<lambda>",
+        "cache",
+    ]
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+from async_asgi_testclient import TestClient
+
+from soie.applications import Soie
+from soie.caching import ResponseCache
+from soie.responses import JSONResponse, PlainTextResponse
+
+
+@pytest.mark.asyncio
+async def test_response_cache():
+    app = Soie()
+    cache = ResponseCache(query_params=("page",), headers=("Accept-Language",))
+    calls = []
+
+    @app.router.http.get("/items/{name}")
+    @cache
+    async def items(request):
+        calls.append(request["path"])
+        return JSONResponse({"name": request.path_params["name"], "page": request.query_params.get("page")})
+
+    @app.router.http.get("/cookie")
+    @cache
+    async def cookie(request):
+        calls.append(request["path"])
+        response = PlainTextResponse("cookie")
+        response.set_cookie("session", "secret")
+        return response
+
+    async with TestClient(app) as client:
+        for _ in range(2):
+            response = await client.get("/items/a?page=1&other=x")
+            assert response.json() == {"name": "a", "page": "1"}
+        await client.get("/items/a?page=1&other=y")
+        await client.get("/items/a?page=2")
+        await client.get("/items/a?page=1", headers={"Accept-Language": "fr"})
+        await client.get("/items/b")
+        assert calls == ["/items/a", "/items/a", "/items/a", "/items/b"]
+        assert cache.cache_info()[:2] == (2, 4) and cache.cache_info().entries == 4
+
+        assert cache.invalidate("/items/a") == 3
+        await client.get("/items/a?page=1")
+        assert calls[-1] == "/items/a" and len(calls) == 5
+
+        await client.get("/cookie")
+        await client.get("/cookie")
+        assert calls[-2:] == ["/cookie", "/cookie"]
+
+
+@pytest.mark.asyncio
+async def test_response_cache_ttl_and_budget(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("soie.caching.time.monotonic", lambda: now[0])
+    cache = ResponseCache(ttl=10)
+    response = await PlainTextResponse("x" * 100).freeze()
+    cache.set("/a", response)
+    now[0] = 9.9
+    assert cache.get("/a") is response
+    now[0] = 10
+    assert cache.get("/a") is None and cache.current_bytes == 0
+
+    size = len("/a") + len(response.content) + sum(len(name) + len(value) for name, value in response.raw)
+    cache = ResponseCache(max_bytes=size * 2)
+    for key in ("/a", "/b", "/c"):
+        cache.set(key, response)
+        cache.get("/a")
+    assert cache.get("/a") is response and cache.get("/b") is None and cache.get("/c") is response
+    assert cache.evictions == 1 and cache.current_bytes == size * 2
+
+
+@pytest.mark.asyncio
+async def test_response_cache_single_flight():
+    app = Soie()
+    cache = ResponseCache()
+    calls = 0
+    release = asyncio.Event()
+
+    @app.router.http.get("/slow")
+    @cache
+    async def slow(request):
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return PlainTextResponse("slow")
+
+    @app.router.http.get("/error")
+    @cache
+    async def error(request):
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        raise ValueError()
+
+    async with TestClient(app) as client:
+        requests = [asyncio.ensure_future(client.get("/slow")) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        release.set()
+        responses = await asyncio.gather(*requests)
+        assert [response.text for response in responses] == ["slow"] * 5
+        assert calls == 1 and cache.hits == 4 and cache.misses == 1
+
+        release.clear()
+        requests = [asyncio.ensure_future(client.get("/error")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        release.set()
+        results = await asyncio.gather(*requests, return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_response_cache_uses_app_json_backend():
+    app = Soie(json_backend=lambda content: b'{"encoded":true}')
+
+    @app.router.http.get("/cached")
+    @ResponseCache()
+    async def cached(request):
+        return JSONResponse({"encoded": False})
+
+    async with TestClient(app) as client:
+        for _ in range(2):
+            assert (await client.get("/cached")).json() == {"encoded": True}
@@ -0,0 +1,141 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+
+from soie.applications import Soie
+from soie.compression import CompressionMiddleware
+from soie.middleware import Middleware
+from soie.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    PrebuiltResponse,
+    StreamingResponse,
+)
+
+LARGE = "soie " * 200
+
+
+def compressed_app():
+    return Soie(middleware=[Middleware(CompressionMiddleware, minimum_size=100)])
+
+
+async def raw_get(app, path, accept_encoding=None, headers=()):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "headers": [*headers]
+        if accept_encoding is None
+        else [(b"accept-encoding", accept_encoding.encode()), *headers],
+        "query_string": b"",
+    }
+    messages = []
+    requests = [{"type": "http.request", "body": b""}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start, *bodies = messages
+    return dict(start["headers"]), b"".join(message.get("body", b"") for message in bodies)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip, deflate", "gzip"),
+        ("deflate, gzip;q=0.5", "deflate"),
+        ("br", None),
+        ("*", "gzip"),
+        ("gzip;q=0, *;q=0.1", "deflate"),
+        ("identity", None),
+    ],
+)
+def test_negotiate(accept_encoding, expected):
+    middleware = CompressionMiddleware(None)  # type: ignore
+    assert middleware.negotiate(accept_encoding) == expected
+    assert middleware.negotiate(accept_encoding) == expected
+
+
+@pytest.mark.asyncio
+async def test_compression():
+    app = compressed_app()
+
+    @app.router.http.get("/large")
+    async def large(request):
+        return PlainTextResponse(LARGE)
+
+    @app.router.http.get("/small")
+    async def small(request):
+        return JSONResponse({"small": True})
+
+    @app.router.http.get("/stream")
+    async def stream(request):
+        return StreamingResponse((LARGE for _ in range(3)), media_type="text/plain")
+
+    headers, body = await raw_get(app, "/large", "gzip")
+    assert headers[b"content-encoding"] == b"gzip" and headers[b"vary"] == b"Accept-Encoding"
+    assert int(headers[b"content-length"]) == len(body) < len(LARGE)
+    assert gzip.decompress(body).decode() == LARGE
+
+    headers, body = await raw_get(app, "/large", "deflate")
+    assert zlib.decompress(body).decode() == LARGE
+
+    headers, body = await raw_get(app, "/large")
+    assert b"content-encoding" not in headers and headers[b"vary"] == b"Accept-Encoding"
+    assert body.decode() == LARGE
+
+    headers, body = await raw_get(app, "/small", "gzip")
+    assert b"content-encoding" not in headers and body == b'{"small":true}'
+
+    headers, body = await raw_get(app, "/stream", "gzip")
+    assert headers[b"content-encoding"] == b"gzip" and b"content-length" not in headers
+    assert gzip.decompress(body).decode() == LARGE * 3
+
+
+@pytest.mark.asyncio
+async def test_prebuilt_response_is_compressed_once():
+    app = compressed_app()
+    response = PrebuiltResponse(LARGE.encode(), headers={"Vary": "Cookie"}, media_type="text/plain")
+
+    @app.router.http.get("/prebuilt")
+    async def prebuilt(request):
+        return response
+
+    first = await raw_get(app, "/prebuilt", "gzip")
+    second = await raw_get(app, "/prebuilt", "gzip")
+    assert first[0][b"vary"] == b"Cookie, Accept-Encoding"
+    assert gzip.decompress(first[1]).decode() == LARGE
+    assert first[1] is second[1]
+    assert list(response._compressed) == [("gzip", 6)]
+
+    headers, body = await raw_get(app, "/prebuilt")
+    assert body == LARGE.encode() and headers[b"vary"] == b"Cookie, Accept-Encoding"
+
+
+@pytest.mark.asyncio
+async def test_not_modified_matches_compressed_response():
+    app = compressed_app()
+
+    @app.router.http.get("/etag")
+    async def etag_view(request):
+        response = PlainTextResponse(LARGE)
+        response.set_etag()
+        return response
+
+    headers, body = await raw_get(app, "/etag", "gzip")
+    etag = headers[b"etag"]
+    assert etag.startswith(b"W/") and headers[b"vary"] == b"Accept-Encoding"
+    assert gzip.decompress(body).decode() == LARGE
+
+    for accept_encoding in ("gzip", None):
+        not_modified, body = await raw_get(app, "/etag", accept_encoding, [(b"if-none-match", etag)])
+        assert body == b"" and not_modified[b"vary"] == b"Accept-Encoding"
+        assert not_modified[b"etag"] == (etag if accept_encoding else etag[2:])
@@ -0,0 +1,28 @@
+import pytest
+
+from soie.encoders import (
+    JSON_ENCODERS,
+    default_json_encoder,
+    get_json_encoder,
+    stdlib_json_dumps,
+)
+
+
+@pytest.mark.parametrize("name", list(JSON_ENCODERS))
+def test_json_encoders_agree(name):
+    encoder = JSON_ENCODERS[name]
+    content = {"name": "蘇依", "tags": ["a", "b"], "count": 1, "ratio": 0.5, "ok": True, "none": None, 1: "int key"}
+    assert encoder(content) == stdlib_json_dumps(content)
+
+
+def test_get_json_encoder():
+    assert get_json_encoder() is default_json_encoder is stdlib_json_dumps
+    assert get_json_encoder("stdlib") is stdlib_json_dumps
+    assert get_json_encoder("auto") in JSON_ENCODERS.values()
+
+    def custom(content):
+        return b"custom"
+
+    assert get_json_encoder(custom) is custom
+    with pytest.raises(ValueError):
+        get_json_encoder("unknown")
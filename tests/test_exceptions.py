@@ -0,0 +1,17 @@
+import pytest
+
+from soie.exceptions import HTTPException, http_exception_to_response
+from soie.responses import PrebuiltResponse
+
+
+@pytest.mark.asyncio
+async def test_http_exception_to_prebuilt_response():
+    not_found = await http_exception_to_response(None, HTTPException(404))
+    assert isinstance(not_found, PrebuiltResponse)
+    assert not_found.content == b'"Nothing matches the given URI"'
+    assert await http_exception_to_response(None, HTTPException(404)) is not_found
+
+    custom = await http_exception_to_response(None, HTTPException(404, message="No such user"))
+    assert not isinstance(custom, PrebuiltResponse)
+    with_headers = await http_exception_to_response(None, HTTPException(401, headers={"WWW-Authenticate": "Basic"}))
+    assert not isinstance(with_headers, PrebuiltResponse)
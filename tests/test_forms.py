@@ -0,0 +1,150 @@
+import pytest
+
+from soie.exceptions import HTTPException
+from soie.forms import (
+    DEFAULT_MAX_URLENCODED_SIZE,
+    MultipartParser,
+    UploadFile,
+    parse_options_header,
+)
+from soie.requests import Request
+
+BOUNDARY = "----soieBoundary7MA4YWxkTrZu0gW"
+
+
+def multipart_body(*parts):
+    body = b"preamble\r\n"
+    for headers, content in parts:
+        body += f"--{BOUNDARY}\r\n".encode() + headers.encode() + b"\r\n\r\n" + content + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\nepilogue".encode()
+
+
+def make_request(body, content_type, chunk_size):
+    chunks = [body[i : i + chunk_size] for i in range(0, len(body), chunk_size)]
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+
+    async def receive():
+        return messages.pop(0)
+
+    headers = [(b"content-type", content_type.encode())]
+    return Request({"type": "http", "headers": headers}, receive)
+
+
+def test_parse_options_header():
+    assert parse_options_header('form-data; name="a;b"; filename="x\\"y.txt"') == (
+        "form-data",
+        {"name": "a;b", "filename": 'x"y.txt'},
+    )
+    assert parse_options_header("Multipart/Form-Data; boundary=abc") == ("multipart/form-data", {"boundary": "abc"})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+async def test_multipart_form(chunk_size):
+    large = bytes(range(256)) * 64 + b"\r\n--" + BOUNDARY[:-1].encode()
+    body = multipart_body(
+        ('Content-Disposition: form-data; name="name"', "蘇逸".encode()),
+        ('Content-Disposition: form-data; name="name"', b""),
+        (
+            'Content-Disposition: form-data; name="file"; filename="a.txt"\r\nContent-Type: text/plain',
+            b"hello\r\n",
+        ),
+        ("Content-Disposition: form-data; name=\"large\"; filename*=utf-8''%E6%AA%94.bin", large),
+    )
+    request = make_request(body, f'multipart/form-data; boundary="{BOUNDARY}"', chunk_size)
+    form = await request.form(spool_max_size=1024)
+    assert await request.form() is form
+
+    assert form.getlist("name") == ["蘇逸", ""]
+    upload = form["file"]
+    assert isinstance(upload, UploadFile)
+    assert (upload.filename, upload.content_type, upload.size) == ("a.txt", "text/plain", 7)
+    assert upload.in_memory and await upload.read() == b"hello\r\n"
+
+    upload = form["large"]
+    assert isinstance(upload, UploadFile)
+    assert upload.filename == "檔.bin" and not upload.in_memory
+    assert await upload.read() == large
+    await form.close()
+    assert upload.file.closed
+
+
+@pytest.mark.asyncio
+async def test_multipart_limits():
+    field = 'Content-Disposition: form-data; name="field"'
+
+    async def parse(body, **limits):
+        return await make_request(body, f"multipart/form-data; boundary={BOUNDARY}", 16).form(**limits)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await parse(multipart_body(*[(field, b"x")] * 3), max_parts=2)
+    assert exc_info.value.status_code == 400
+
+    with pytest.raises(HTTPException) as exc_info:
+        await parse(multipart_body((field, b"x" * 11)), max_field_size=10)
+    assert exc_info.value.status_code == 413
+
+    body = multipart_body((field, b"x" * 100))
+    with pytest.raises(HTTPException) as exc_info:
+        await parse(body, max_size=len(body) - 1)
+    assert exc_info.value.status_code == 413
+
+    with pytest.raises(HTTPException) as exc_info:
+        await parse(body[:-20])
+    assert exc_info.value.status_code == 400
+
+    with pytest.raises(HTTPException):
+        MultipartParser(b"")
+
+
+@pytest.mark.asyncio
+async def test_multipart_constant_memory():
+    chunk = b"x" * 65536
+    parser = MultipartParser(BOUNDARY.encode(), spool_max_size=1024)
+    await parser.feed(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="f"; filename="big"\r\n\r\n'.encode())
+    for _ in range(64):
+        await parser.feed(chunk)
+        assert len(parser._buffer) < len(parser.delimiter)
+    await parser.feed(f"\r\n--{BOUNDARY}--\r\n".encode())
+    upload = parser.items[0][1]
+    assert isinstance(upload, UploadFile) and upload.size == 64 * 65536
+    await upload.close()
+
+
+@pytest.mark.asyncio
+async def test_urlencoded_form():
+    request = make_request(b"a=1&b=%E8%98%87&a=2&empty=", "application/x-www-form-urlencoded", 3)
+    form = await request.form()
+    assert form.getlist("a") == ["1", "2"] and form["b"] == "蘇" and form["empty"] == ""
+    assert form.multi_items() == [("a", "1"), ("b", "蘇"), ("a", "2"), ("empty", "")]
+
+    with pytest.raises(HTTPException) as exc_info:
+        await make_request(b"a=1&b=2&c=3", "application/x-www-form-urlencoded", 3).form(max_parts=2)
+    assert exc_info.value.status_code == 400
+
+    with pytest.raises(HTTPException) as exc_info:
+        await make_request(b"a=12345", "application/x-www-form-urlencoded", 3).form(max_field_size=4)
+    assert exc_info.value.status_code == 413
+
+    assert len(await make_request(b"{}", "application/json", 3).form()) == 0
+
+
+@pytest.mark.asyncio
+async def test_urlencoded_limits_while_reading():
+    chunks = [b"a=1&b=", *[b"x" * 8] * 100, b"&c=3"]
+
+    async def receive():
+        return {"type": "http.request", "body": chunks.pop(0), "more_body": bool(chunks)}
+
+    request = Request({"type": "http", "headers": [(b"content-type", b"application/x-www-form-urlencoded")]}, receive)
+    with pytest.raises(HTTPException) as exc_info:
+        await request.form(max_field_size=10)
+    assert exc_info.value.status_code == 413
+    # Rejected long before the whole body was received.
+    assert len(chunks) > 90
+
+    body = b"a=" + b"x" * (DEFAULT_MAX_URLENCODED_SIZE // 2) + b"&b=" + b"x" * (DEFAULT_MAX_URLENCODED_SIZE // 2)
+    with pytest.raises(HTTPException) as exc_info:
+        await make_request(body, "application/x-www-form-urlencoded", 65536).form()
+    assert exc_info.value.status_code == 413
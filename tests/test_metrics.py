@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from async_asgi_testclient import TestClient
+
+from soie.applications import Soie
+from soie.exceptions import HTTPException
+from soie.metrics import Histogram, Metrics
+from soie.responses import PlainTextResponse
+
+
+def test_histogram():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4 and histogram.sum == pytest.approx(2.65)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("with_middleware", [False, True])
+async def test_metrics(with_middleware):
+    async def middleware(request, call_next):
+        return await call_next(request)
+
+    metrics = Metrics(buckets=(0.5, 0.001))
+    app = Soie(metrics=metrics, middleware=[middleware] if with_middleware else [])
+
+    @app.router.http.get("/users/{id:int}")
+    async def user(request):
+        return PlainTextResponse(str(request.path_params["id"]))
+
+    @app.router.http.get("/forbidden")
+    async def forbidden(request):
+        raise HTTPException(403)
+
+    async with TestClient(app) as client:
+        for i in range(3):
+            assert (await client.get(f"/users/{i}")).text == str(i)
+        assert (await client.get("/forbidden")).status_code == 403
+        assert (await client.get("/not_found")).status_code == 404
+        response = await client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert 'soie_requests_total{route="/users/{id:int}",status="2xx"} 3' in lines
+    assert 'soie_requests_total{route="/forbidden",status="4xx"} 1' in lines
+    assert 'soie_requests_total{route="",status="4xx"} 1' in lines
+    for phase in ("routing", "handler", "send"):
+        labels = f'route="/users/{{id:int}}",phase="{phase}"'
+        assert f'soie_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in lines
+        assert f"soie_request_duration_seconds_count{{{labels}}} 3" in lines
+    routing = metrics.routes["/users/{id:int}"].phases[0]
+    assert routing.sum > 0 and metrics.buckets == (0.001, 0.5)
+
+
+@pytest.mark.asyncio
+async def test_metrics_of_unmatched_requests():
+    observed = []
+
+    class RecordingMetrics(Metrics):
+        def observe(self, route, status_code, routing, handler, send):
+            observed.append((route, status_code, routing, handler, send))
+            super().observe(route, status_code, routing, handler, send)
+
+    async def slow_not_found(request, exc):
+        await asyncio.sleep(0.05)
+        return PlainTextResponse("missing", exc.status_code)
+
+    app = Soie(metrics=RecordingMetrics(), exception_handlers={HTTPException: slow_not_found})
+    async with TestClient(app) as client:
+        assert (await client.get("/not_found")).status_code == 404
+
+    [(route, status_code, routing, handler, send)] = observed
+    assert (route, status_code) == ("", 404)
+    assert routing > 0 and handler < 0.05 <= send
+
+
+def test_metrics_disabled():
+    app = Soie()
+    assert app.metrics is None and app.http == app.__class__.http.__get__(app)
+    assert app.router.static_routes == {}
@@ -0,0 +1,56 @@
+import os
+import pstats
+
+import pytest
+from async_asgi_testclient import TestClient
+
+from soie.applications import Soie
+from soie.profiling import Profiler
+from soie.responses import PlainTextResponse
+
+
+@pytest.mark.asyncio
+async def test_profiler(tmp_path):
+    profiler = Profiler(str(tmp_path), sample_rate=3, trigger_header="X-Profile", trigger_token="secret", max_files=3)
+    app = Soie(middleware=[profiler])
+
+    @app.router.http.get("/items/{id}")
+    async def item(request):
+        return PlainTextResponse(request.path_params["id"])
+
+    async with TestClient(app) as client:
+        for i in range(6):
+            assert (await client.get(f"/items/{i}")).text == str(i)
+        assert len(profiler.files) == 2
+
+        await client.get("/items/wrong", headers={"X-Profile": "guess"})
+        await client.get("/items/triggered", headers={"X-Profile": "secret"})
+        assert len(profiler.files) == 3
+        assert profiler.files[-1].endswith("-GET-items_triggered.pstats")
+
+        await client.get("/items/again", headers={"X-Profile": "secret"})
+
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in profiler.files)
+    assert len(profiler.files) == 3
+    stats = pstats.Stats(profiler.files[-1])
+    assert any(function == "item" for _, _, function in stats.stats)  # type: ignore
+
+    assert len(Profiler(str(tmp_path)).files) == 3
+
+
+@pytest.mark.asyncio
+async def test_profiler_save_error_is_logged(tmp_path, caplog):
+    directory = tmp_path / "profiles"
+    profiler = Profiler(str(directory), sample_rate=1)
+    app = Soie(middleware=[profiler])
+
+    @app.router.http.get("/index")
+    async def index(request):
+        return PlainTextResponse("ok")
+
+    directory.rmdir()
+    async with TestClient(app) as client:
+        response = await client.get("/index")
+    assert response.status_code == 200 and response.text == "ok"
+    assert not profiler.files
+    assert "Could not save the profile of GET /index" in caplog.text
@@ -1,6 +1,7 @@
 import pytest
 
-from soie.requests import QueryParams
+from soie.exceptions import ClientDisconnect, HTTPException
+from soie.requests import QueryParams, Request, RequestHeaders
 
 
 def test_query_params():
@@ -10,3 +11,122 @@ def test_query_params():
 
     with pytest.raises(KeyError):
         query["error"]
+
+
+def test_query_params_multi_values():
+    query = QueryParams(b"tag=a&tag=b&page=2&debug=on&name=%E8%98%87%E4%BE%9D&empty=&size=big")
+    assert query._lists is None
+
+    assert query["tag"] == "b"
+    assert query.getlist("tag") == ["a", "b"]
+    assert query.getlist("missing") == []
+    assert query.get("missing", "default") == "default"
+    assert query["name"] == "蘇依"
+    assert query["empty"] == ""
+    assert query.get_int("page") == 2
+    assert query.get_int("size", 10) == 10
+    assert query.get_int("missing") is None
+    assert query.get_bool("debug") is True
+    assert query.get_bool("size", False) is False
+    assert "tag" in query
+    assert len(query) == 6
+    assert query.multi_items()[:2] == [("tag", "a"), ("tag", "b")]
+
+
+def test_query_params_long_query_string():
+    query = QueryParams("&".join(f"key{i % 100}={i}" for i in range(100_000)).encode())
+    assert len(query) == 100
+    assert len(query.getlist("key0")) == 1000
+
+
+def test_request_headers():
+    raw = [(b"host", b"example.com"), (b"accept", b"text/html"), (b"accept", b"application/json")]
+    request = Request({"type": "http", "headers": raw}, None)
+    headers = request.headers
+
+    assert request.headers is headers
+    assert headers._index is None
+    assert headers["Host"] == "example.com"
+    assert headers["accept"] == "text/html, application/json"
+    assert headers.getlist("ACCEPT") == ["text/html", "application/json"]
+    assert headers.getlist("cookie") == []
+    assert headers.get("cookie", "default") == "default"
+    assert "HOST" in headers
+    assert list(headers) == ["host", "accept"]
+    assert len(headers) == 2
+    assert headers.raw == raw
+
+    with pytest.raises(KeyError):
+        headers["cookie"]
+
+    assert len(RequestHeaders([])) == 0
+
+
+def test_request_cookies():
+    raw = [(b"cookie", b'session=abc; theme="d\\141rk"'), (b"Cookie", b"session=other; bare")]
+    request = Request({"type": "http", "headers": raw}, None)
+    assert request._cookies is None
+    assert request.cookies == {"session": "abc", "theme": "dark", "": "bare"}
+    assert request.cookies is request.cookies
+
+    assert Request({"type": "http", "headers": []}, None).cookies == {}
+
+
+def make_receive(*chunks, disconnect=False):
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+    if disconnect:
+        messages.append({"type": "http.disconnect"})
+    else:
+        messages.append({"type": "http.request", "body": b"", "more_body": False})
+    received = []
+
+    async def receive():
+        message = messages.pop(0)
+        received.append(message)
+        return message
+
+    receive.received = received
+    return receive
+
+
+@pytest.mark.asyncio
+async def test_request_body():
+    request = Request({"type": "http", "headers": []}, make_receive(b'{"name": ', b'"soie"}'))
+
+    assert await request.body() == b'{"name": "soie"}'
+    assert await request.json() == {"name": "soie"}
+    assert await request.json() is await request.json()
+    assert [chunk async for chunk in request.stream()] == [b'{"name": "soie"}']
+
+
+@pytest.mark.asyncio
+async def test_request_stream_consumed_once():
+    request = Request({"type": "http", "headers": []}, make_receive(b"da", b"ta"))
+    assert [chunk async for chunk in request.stream()] == [b"da", b"ta"]
+    with pytest.raises(RuntimeError):
+        await request.body()
+
+
+@pytest.mark.asyncio
+async def test_request_body_disconnect():
+    request = Request({"type": "http", "headers": []}, make_receive(b"data", disconnect=True))
+    with pytest.raises(ClientDisconnect):
+        await request.body()
+
+
+@pytest.mark.asyncio
+async def test_request_max_body_size():
+    receive = make_receive(b"12345", b"67890", b"abcde")
+    request = Request({"type": "http", "headers": []}, receive)
+    request.max_body_size = 8
+    with pytest.raises(HTTPException) as exc_info:
+        await request.body()
+    assert exc_info.value.status_code == 413
+    assert len(receive.received) == 2
+
+    receive = make_receive(b"12345")
+    request = Request({"type": "http", "headers": [(b"content-length", b"100")]}, receive)
+    request.max_body_size = 8
+    with pytest.raises(HTTPException):
+        await request.body()
+    assert receive.received == []
@@ -1,7 +1,19 @@
+import asyncio
+
 import pytest
 from async_asgi_testclient import TestClient
 
-from soie.responses import JSONResponse
+from soie.requests import Request
+from soie.responses import (
+    FileResponse,
+    JSONResponse,
+    PlainTextResponse,
+    PrebuiltResponse,
+    StreamingResponse,
+    check_not_modified,
+    cookie_attributes,
+    parse_range_header,
+)
 
 
 @pytest.mark.asyncio
@@ -13,3 +25,345 @@ async def test_json_none_response():
     async with TestClient(app) as client:
         response = await client.get("/")
         assert response.json() is None
+
+
+@pytest.mark.asyncio
+async def test_json_response_encoder():
+    async def app(scope, receive, send):
+        response = JSONResponse({"name": "soie"}, json_encoder="stdlib")
+        await response(scope, receive, send)
+
+    async with TestClient(app) as client:
+        response = await client.get("/")
+        assert response.content == b'{"name":"soie"}'
+        assert response.headers["content-type"] == "application/json"
+
+
+@pytest.mark.asyncio
+async def test_streaming_response():
+    async def numbers():
+        for i in range(3):
+            yield str(i)
+
+    async def app(scope, receive, send):
+        if scope.get("path") == "/sync":
+            response = StreamingResponse(iter([b"a", "b", b"c"]))
+        else:
+            response = StreamingResponse(numbers(), media_type="text/csv")
+        await response(scope, receive, send)
+
+    async with TestClient(app) as client:
+        response = await client.get("/async")
+        assert response.text == "012"
+        assert response.headers["content-type"] == "text/csv; charset=utf-8"
+        assert "content-length" not in response.headers
+
+        response = await client.get("/sync")
+        assert response.text == "abc"
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_stops_on_disconnect():
+    produced = []
+    disconnect = asyncio.Event()
+    messages = []
+
+    async def chunks():
+        for i in range(1000):
+            produced.append(i)
+            yield b"x"
+            if i == 2:
+                disconnect.set()
+            await asyncio.sleep(0)
+
+    async def receive():
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    response = StreamingResponse(chunks())
+    await response({"type": "http"}, receive, send)
+
+    assert len(produced) < 1000
+    assert messages[0]["type"] == "http.response.start"
+    assert all(message["more_body"] for message in messages[1:])
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_echoes_request_stream():
+    incoming = asyncio.Queue()
+    messages = []
+
+    async def client():
+        for chunk in (b"a", b"b", b"c", b"d"):
+            await asyncio.sleep(0.01)
+            incoming.put_nowait({"type": "http.request", "body": chunk, "more_body": chunk != b"d"})
+
+    async def receive():
+        return await incoming.get()
+
+    async def send(message):
+        messages.append(message)
+        if message["type"] == "http.response.body" and not message["more_body"]:
+            incoming.put_nowait({"type": "http.disconnect"})
+
+    scope = {"type": "http", "headers": []}
+    request = Request(scope, receive)
+    sending = asyncio.ensure_future(client())
+    await asyncio.wait_for(StreamingResponse(request.stream())(scope, receive, send), 1)
+    await sending
+    assert b"".join(message.get("body", b"") for message in messages) == b"abcd"
+
+
+@pytest.mark.asyncio
+async def test_file_response(tmp_path):
+    path = tmp_path / "data.txt"
+    content = b"".join(str(i).encode() for i in range(1000))
+    path.write_bytes(content)
+
+    async def app(scope, receive, send):
+        response = FileResponse(path)
+        response.chunk_size = 1024
+        await response(scope, receive, send)
+
+    async with TestClient(app) as client:
+        response = await client.get("/")
+        assert response.status_code == 200
+        assert response.content == content
+        assert response.headers["content-type"] == "text/plain; charset=utf-8"
+        assert response.headers["content-length"] == str(len(content))
+        assert response.headers["accept-ranges"] == "bytes"
+        assert "last-modified" in response.headers
+        etag = response.headers["etag"]
+
+        response = await client.head("/")
+        assert response.status_code == 200
+        assert response.content == b""
+        assert response.headers["content-length"] == str(len(content))
+
+        response = await client.get("/", headers={"Range": "bytes=10-19"})
+        assert response.status_code == 206
+        assert response.content == content[10:20]
+        assert response.headers["content-range"] == f"bytes 10-19/{len(content)}"
+
+        response = await client.get("/", headers={"Range": "bytes=10-19", "If-Range": '"stale"'})
+        assert response.status_code == 200
+        response = await client.get("/", headers={"Range": "bytes=10-19", "If-Range": etag})
+        assert response.status_code == 206
+
+        response = await client.get("/", headers={"Range": "bytes=0-4,-5"})
+        assert response.status_code == 206
+        boundary = response.headers["content-type"].split("boundary=")[1]
+        assert response.headers["content-length"] == str(len(response.content))
+        parts = response.content.split(f"--{boundary}".encode())
+        assert parts[1].endswith(b"\r\n\r\n" + content[:5] + b"\r\n")
+        assert parts[2].endswith(b"\r\n\r\n" + content[-5:] + b"\r\n")
+        assert parts[3] == b"--\r\n"
+
+        response = await client.get("/", headers={"Range": f"bytes={len(content)}-"})
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(content)}"
+
+
+@pytest.mark.asyncio
+async def test_file_response_pathsend(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"data")
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "headers": [], "extensions": {"http.response.pathsend": {}}}
+    await FileResponse(path)(scope, None, send)
+
+    assert messages[0]["status"] == 200
+    assert (b"content-type", b"application/octet-stream") in messages[0]["headers"]
+    assert messages[1] == {"type": "http.response.pathsend", "path": str(path)}
+
+
+@pytest.mark.parametrize(
+    "value,ranges",
+    [
+        ("bytes=0-9", [(0, 10)]),
+        ("bytes=90-", [(90, 100)]),
+        ("bytes=-10", [(90, 100)]),
+        ("bytes=0-200", [(0, 100)]),
+        ("bytes=50-59,0-9,5-14", [(0, 15), (50, 60)]),
+        ("bytes=100-", []),
+        ("bytes=-0", []),
+        ("bytes=9-0", None),
+        ("bytes=-", None),
+        ("bytes=a-b", None),
+        ("items=0-9", None),
+    ],
+)
+def test_parse_range_header(value, ranges):
+    assert parse_range_header(value, 100) == ranges
+
+
+@pytest.mark.asyncio
+async def test_prebuilt_response():
+    response = await JSONResponse({"status": "ok"}, headers={"x-version": "1"}, json_encoder="stdlib").freeze()
+    assert isinstance(response, PrebuiltResponse)
+    assert await response.freeze() is response
+
+    for _ in range(2):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await response({"type": "http"}, None, send)
+        start, body = messages
+        assert start["status"] == 200
+        assert start["headers"] == [
+            (b"x-version", b"1"),
+            (b"content-length", b"15"),
+            (b"content-type", b"application/json"),
+        ]
+        assert body["body"] == b'{"status":"ok"}'
+        start["headers"].append((b"x-extra", b"mutated"))
+
+    with pytest.raises(TypeError):
+        response.headers["x-version"] = "2"  # type: ignore[index]
+    with pytest.raises(RuntimeError):
+        response.set_cookie("session", "abc")
+    with pytest.raises(RuntimeError):
+        response.set_etag("v2")
+    with pytest.raises(RuntimeError):
+        response.status_code = 418
+    with pytest.raises(RuntimeError):
+        response.content = b"{}"
+    assert response.headers["x-version"] == "1" and response.cookies == {}
+
+    async def send_copy(copy):
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await copy({"type": "http"}, None, send)
+        return messages
+
+    unchanged = response.copy()
+    start, body = await send_copy(unchanged)
+    assert start["headers"] == response.raw and body["body"] is response.content
+
+    changed = response.copy()
+    changed.status_code = 418
+    changed.content = b"[]"
+    changed.headers["x-version"] = "2"
+    changed.set_cookie("session", "abc")
+    start, body = await send_copy(changed)
+    assert start["status"] == 418 and body["body"] == b"[]"
+    assert dict(start["headers"])[b"x-version"] == b"2" and dict(start["headers"])[b"content-length"] == b"2"
+    assert dict(start["headers"])[b"set-cookie"].startswith(b"session=abc")
+    assert response.status_code == 200 and response.headers["x-version"] == "1" and response.cookies == {}
+
+
+@pytest.mark.asyncio
+async def test_freeze_keeps_cookies():
+    response = PlainTextResponse("hello")
+    response.set_cookie("session", "abc")
+    prebuilt = await response.freeze()
+    assert [value for key, value in prebuilt.raw if key == b"set-cookie"] == [b"session=abc; Path=/; SameSite=lax"]
+
+
+def test_set_cookie():
+    response = PlainTextResponse("hello")
+    assert "_cookies" not in vars(response) and response.cookies == {}
+    assert [key for key, _ in response.raw_headers()] == [b"content-type"]
+
+    attributes = cookie_attributes(max_age=60, secure=True, httponly=True, samesite="strict")
+    assert attributes == "; Max-Age=60; Path=/; Secure; HttpOnly; SameSite=strict"
+    response.set_cookie("session", "a b;c", attributes=attributes)
+    response.set_cookie("theme", "dark", path=None, domain="example.com", samesite=None)
+    response.delete_cookie("old")
+    assert response.cookies["session"] == 'session="a b\\073c"; Max-Age=60; Path=/; Secure; HttpOnly; SameSite=strict'
+    assert response.cookies["theme"] == "theme=dark; Domain=example.com"
+    assert response.cookies["old"].startswith('old=""; Max-Age=0; Path=/; SameSite=lax; Expires=')
+    assert len([key for key, _ in response.raw_headers() if key == b"set-cookie"]) == 3
+
+    response.set_cookie("url", "/a?b={c}[d]=e")
+    assert response.cookies["url"].startswith('url="/a?b={c}[d]=e";')
+    for name in ("a\r\nX-Evil: 1", "a;b", "a=b", "", "a b", "é"):
+        with pytest.raises(ValueError):
+            response.set_cookie(name, "v")
+    for attributes in ({"path": "/\r\nX-Evil: 1"}, {"domain": "example.com; Secure"}):
+        with pytest.raises(ValueError):
+            response.set_cookie("injected", "v", **attributes)
+    assert "injected" not in response.cookies
+
+
+@pytest.mark.asyncio
+async def test_conditional_get(tmp_path):
+    prebuilt = JSONResponse({"name": "soie"})
+    prebuilt.set_etag(weak=True)
+    prebuilt = await prebuilt.freeze()
+    file_path = tmp_path / "example.txt"
+    file_path.write_bytes(b"soie")
+    serialized = []
+
+    def json_encoder(content):
+        serialized.append(content)
+        return b"{}"
+
+    async def app(scope, receive, send):
+        path = scope.get("path")
+        if path == "/token":
+            response = JSONResponse({}, json_encoder=json_encoder)
+            response.set_etag("v2")
+        elif path == "/version":
+            response = check_not_modified(scope, etag="v1")
+            if response is None:
+                response = PlainTextResponse("expensive")
+                response.set_etag("v1")
+        elif path == "/prebuilt":
+            response = prebuilt
+        elif path == "/file":
+            response = FileResponse(file_path)
+        else:
+            response = PlainTextResponse("soie", headers={"Cache-Control": "max-age=60"})
+            response.set_etag()
+        await response(scope, receive, send)
+
+    async with TestClient(app) as client:
+        response = await client.get("/")
+        etag = response.headers["etag"]
+        assert response.text == "soie" and not etag.startswith("W/")
+
+        response = await client.get("/", headers={"If-None-Match": f'"other", {etag}'})
+        assert response.status_code == 304 and response.content == b""
+        assert response.headers["etag"] == etag and response.headers["cache-control"] == "max-age=60"
+        assert "content-length" not in response.headers and "content-type" not in response.headers
+
+        response = await client.post("/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+
+        response = await client.get("/version", headers={"If-None-Match": '"v1"'})
+        assert response.status_code == 304 and response.headers["etag"] == '"v1"'
+        response = await client.get("/version", headers={"If-None-Match": '"v0"'})
+        assert response.text == "expensive" and response.headers["etag"] == '"v1"'
+
+        response = await client.get("/token", headers={"If-None-Match": '"v2"'})
+        assert response.status_code == 304 and serialized == []
+        response = await client.get("/token")
+        assert response.status_code == 200 and len(serialized) == 1
+
+        response = await client.get("/prebuilt")
+        etag = response.headers["etag"]
+        assert etag.startswith("W/")
+        response = await client.get("/prebuilt", headers={"If-None-Match": etag.removeprefix("W/")})
+        assert response.status_code == 304
+
+        response = await client.get("/file")
+        last_modified = response.headers["last-modified"]
+        response = await client.get("/file", headers={"If-Modified-Since": last_modified})
+        assert response.status_code == 304
+        response = await client.get("/file", headers={"If-Modified-Since": last_modified, "If-None-Match": '"stale"'})
+        assert response.status_code == 200 and response.content == b"soie"
+        response = await client.get("/file", headers={"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"})
+        assert response.status_code == 200
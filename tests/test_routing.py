@@ -62,6 +62,162 @@ def test_dynamic_path_search():
     assert router.search(FakeRequest("/project/another")) is None
 
 
+def test_builtin_params_convertor_match_from_offset():
+    assert RawConvertor().match("/hello/world", 7) == "world"
+    assert IntegerConvertor().match("/order/123/items", 7) == "123"
+    with pytest.raises(ParamNotMatched):
+        IntegerConvertor().match("/order/abc", 7)
+
+
+def test_backtracking_drops_params_of_failed_branch():
+    info_route = Route("/{name}/info", fake_view)
+    user_route = Route("/users/{id:int}", fake_view)
+    router = Router([info_route, user_route])
+
+    request = FakeRequest("/users/5")
+    assert router.search(request) is user_route
+    assert request.path_params == {"id": 5}
+
+    request = FakeRequest("/users/info")
+    assert router.search(request) is info_route
+    assert request.path_params == {"name": "users"}
+
+
+def test_static_routes_index():
+    router = Router()
+    assert router.static_routes == {}
+
+    health = Route("/health", fake_view)
+    items = Route("/api/v1/items", fake_view)
+    item = Route("/api/v1/items/{id:int}", fake_view)
+    router.add_route(health).add_route(item).add_route(items)
+
+    assert router.static_routes == {"/health": health, "/api/v1/items": items}
+    request = FakeRequest("/api/v1/items")
+    request.path_params = {"stale": "value"}
+    assert router.search(request) is items
+    assert request.path_params == {}
+    assert router.search(FakeRequest("/api/v1/items/1")) is item
+
+    with pytest.raises(ValueError):
+        router.add_route(Route("/health", fake_view))
+    assert router.static_routes["/health"] is health
+
+
+def test_route_method_dispatch_table():
+    async def create_view(request):
+        return PlainTextResponse()
+
+    router = Router()
+    router.add_route(Route("/items", fake_view, ("GET",)))
+    router.add_route(Route("/items", create_view, ("POST",)))
+    route = router.search(FakeRequest("/items"))
+
+    assert route.get_endpoint("GET") is fake_view
+    assert route.get_endpoint("HEAD") is fake_view
+    assert route.get_endpoint("POST") is create_view
+    assert route.get_endpoint("OPTIONS") is route.endpoints["OPTIONS"]
+    assert route.get_endpoint("DELETE") is route.fallback
+
+    with pytest.raises(ValueError):
+        router.add_route(Route("/items", create_view, ("POST",)))
+    with pytest.raises(ValueError):
+        router.add_route(Route("/items", create_view))
+
+
+def test_route_without_methods_handles_any_method():
+    route = Route("/any", fake_view)
+    assert route.get_endpoint("GET") is fake_view
+    assert route.get_endpoint("PURGE") is fake_view
+
+
+def test_router_lookup_cache():
+    user_route = Route("/users/{id:int}", fake_view)
+    router = Router([user_route], cache_size=2)
+
+    for path, params in [("/users/1", {"id": 1}), ("/users/1", {"id": 1}), ("/users/2", {"id": 2})]:
+        request = FakeRequest(path)
+        assert router.search(request) is user_route
+        assert request.path_params == params
+    assert router.cache_info() == (1, 2, 0, 2, 2)
+
+    router.search(FakeRequest("/users/3"))
+    assert router.cache_info().evictions == 1
+    assert router.search(FakeRequest("/users/not-a-number")) is None
+    assert router.cache_info().currsize == 2
+
+    request = FakeRequest("/users/2")
+    router.search(request)
+    request.path_params["id"] = 0
+    assert router.cache_info().hits == 2
+    request = FakeRequest("/users/2")
+    router.search(request)
+    assert request.path_params == {"id": 2}
+
+    name_route = Route("/users/{id:int}/name", fake_view)
+    router.add_route(name_route)
+    assert router.cache_info().currsize == 0
+    assert router.search(FakeRequest("/users/2/name")) is name_route
+
+
+def test_router_lookup_cache_disabled_by_default():
+    router = Router([Route("/users/{id:int}", fake_view)])
+    router.search(FakeRequest("/users/1"))
+    assert router.cache_info() == (0, 0, 0, 0, 0)
+
+    with pytest.raises(ValueError):
+        Router(cache_size=0)
+
+
+def test_compiled_matcher_behaves_like_search():
+    paths = [
+        "/hello",
+        "/hi/{name}",
+        "/order/{id:int}",
+        "/order/{id:int}/items/{item}",
+        "/order/top",
+        "/{name}/info",
+        "/users/{id:int}",
+        "/users/{id:int}/name",
+        "/archives/file.{suffix}",
+    ]
+    router = Router([Route(path, fake_view) for path in paths])
+    real_paths = [
+        "/hello",
+        "/hell",
+        "/hi/Jack",
+        "/hi/",
+        "/order/12",
+        "/order/12/items/a",
+        "/order/12/items/",
+        "/order/top",
+        "/order/topx",
+        "/users/info",
+        "/users/5",
+        "/users/5/name",
+        "/users/five/name",
+        "/archives/file.jpg",
+        "/archives/file.",
+        "/",
+        "",
+    ]
+    expected = []
+    for path in real_paths:
+        request = FakeRequest(path)
+        expected.append((router.search(request), request.path_params))
+
+    router.compile()
+    assert router.compiled
+    for path, (route, params) in zip(real_paths, expected):
+        request = FakeRequest(path)
+        assert router.search(request) is route, path
+        assert request.path_params == params, path
+
+    router.add_route(Route("/hi/{name}/age", fake_view))
+    assert not router.compiled
+    assert router.search(FakeRequest("/hi/Jack/age")) is not None
+
+
 async def fake_view(request):
     return PlainTextResponse()
 
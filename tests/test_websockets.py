@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from async_asgi_testclient import TestClient
+
+from soie.applications import Soie
+from soie.websockets import WebSocket, WebSocketGroup, WebSocketState
+
+
+@pytest.mark.asyncio
+async def test_websocket_route():
+    app = Soie()
+
+    @app.router.websocket("/echo/{name}")
+    async def echo(websocket: WebSocket):
+        await websocket.accept()
+        await websocket.send_json({"name": websocket.path_params["name"], "q": websocket.query_params.get("q")})
+        async for text in websocket.iter_text():
+            await websocket.send_text(text.upper())
+
+    @app.router.http.get("/echo/{name}")
+    async def http_echo(request):
+        raise AssertionError("HTTP route must not be used for WebSocket")
+
+    async with TestClient(app) as client:
+        async with client.websocket_connect("/echo/soie?q=1") as websocket:
+            assert await websocket.receive_json() == {"name": "soie", "q": "1"}
+            await websocket.send_text("hello")
+            assert await websocket.receive_text() == "HELLO"
+
+
+@pytest.mark.asyncio
+async def test_websocket_unknown_path_and_error():
+    app = Soie()
+
+    @app.router.websocket("/error")
+    async def error(websocket: WebSocket):
+        await websocket.accept()
+        raise ValueError()
+
+    async def connect(path, sent):
+        async def receive():
+            return {"type": "websocket.connect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "websocket", "path": path, "headers": [], "query_string": b""}
+        await app(scope, receive, send)
+
+    sent: list = []
+    await connect("/not_found", sent)
+    assert sent == [{"type": "websocket.close", "code": 1000, "reason": ""}]
+
+    sent = []
+    with pytest.raises(ValueError):
+        await connect("/error", sent)
+    assert [message["type"] for message in sent] == ["websocket.accept", "websocket.close"]
+    assert sent[-1]["code"] == 1011
+
+    with pytest.raises(ValueError):
+        app.router.websocket("/error")(error)
+
+
+class FakeWebSocket(WebSocket):
+    def __init__(self, block: bool = False) -> None:
+        self.block = block
+        self.messages = []
+        super().__init__({"type": "websocket"}, None, self.record)  # type: ignore
+        self.state = WebSocketState.CONNECTED
+
+    async def record(self, message):
+        if self.block and message["type"] != "websocket.close":
+            await asyncio.Event().wait()
+        self.messages.append(message)
+
+
+@pytest.mark.asyncio
+async def test_websocket_group_drops_slow_consumer():
+    group = WebSocketGroup(max_queue_size=2)
+    fast, other, slow = FakeWebSocket(), FakeWebSocket(), FakeWebSocket(block=True)
+    for websocket in (fast, other, slow):
+        group.add(websocket)
+
+    for i in range(4):
+        group.broadcast_json({"i": i})
+        await asyncio.sleep(0)
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    assert [message["text"] for message in fast.messages] == ['{"i":0}', '{"i":1}', '{"i":2}', '{"i":3}']
+    # The message is serialized once and shared by every member.
+    assert fast.messages == other.messages and fast.messages[0] is other.messages[0]
+    assert slow not in group and group.dropped == 1
+    assert slow.messages == [
+        {"type": "websocket.close", "code": 1013, "reason": "Too slow to keep up with the broadcast."}
+    ]
+
+    await group.remove(fast)
+    await group.remove(other)
+    assert len(group) == 0
+
+
+@pytest.mark.asyncio
+async def test_websocket_group_skips_for_slow_consumer():
+    group = WebSocketGroup(max_queue_size=1, slow_consumer="skip")
+    fast, slow = FakeWebSocket(), FakeWebSocket(block=True)
+    async with group.join(fast), group.join(slow):
+        assert group.broadcast_bytes(b"0") == 2
+        await asyncio.sleep(0)
+        assert group.broadcast_bytes(b"1") == 2
+        await asyncio.sleep(0)
+        assert group.broadcast_bytes(b"2") == 1
+        await asyncio.sleep(0)
+        assert slow in group and group.skipped == 1
+    assert len(group) == 0